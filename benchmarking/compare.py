@@ -0,0 +1,153 @@
+import math
+import os
+from typing import Any
+
+import numpy as np
+
+from .history import config_differences
+from .metrics import OPERATIONS
+from .plotter import plot_comparison
+
+DEFAULT_ALPHA = 0.05  # Significance level of the Mann-Whitney U test
+DEFAULT_TIME_THRESHOLD = 0.05  # Ignore significant changes smaller than 5%
+DEFAULT_SIZE_THRESHOLD = 0.0  # Any proof-size growth is flagged
+# Settings that only select which cells are run; they do not change a cell's measurements.
+CELL_SELECTION_KEYS = ("sizes", "schemes", "runs")
+
+def mann_whitney_u(a: list[float], b: list[float]) -> float:
+    """
+    Two-sided p-value of the Mann-Whitney U test (normal approximation with
+    tie and continuity correction). Nonparametric, so it suits skewed timing
+    samples; with very few samples it is conservative.
+    """
+    n1, n2 = len(a), len(b)
+    if n1 == 0 or n2 == 0:
+        return 1.0
+    combined = np.concatenate([np.asarray(a, dtype=float), np.asarray(b, dtype=float)])
+    _, inverse, counts = np.unique(combined, return_inverse=True, return_counts=True)
+    average_ranks = np.cumsum(counts) - (counts - 1) / 2
+    ranks = average_ranks[inverse]
+
+    u1 = ranks[:n1].sum() - n1 * (n1 + 1) / 2
+    n = n1 + n2
+    tie_term = float(np.sum(counts ** 3 - counts)) / (n * (n - 1))
+    sigma = math.sqrt(n1 * n2 / 12 * ((n + 1) - tie_term))
+    if sigma == 0:
+        return 1.0
+    z = (abs(u1 - n1 * n2 / 2) - 0.5) / sigma
+    return math.erfc(max(z, 0.0) / math.sqrt(2))
+
+def _group(records: list[dict[str, Any]]) -> dict[tuple[str, int], list[dict[str, Any]]]:
+    grouped: dict[tuple[str, int], list[dict[str, Any]]] = {}
+    for record in records:
+        grouped.setdefault((record["scheme"], record["state_size"]), []).append(record)
+    return grouped
+
+def config_warnings(
+    base_records: list[dict[str, Any]],
+    new_records: list[dict[str, Any]],
+    base_config: dict[str, Any] | None = None,
+    new_config: dict[str, Any] | None = None,
+) -> list[str]:
+    """
+    Describes configuration differences that make two runs measure different
+    things, e.g. a different update count changes what batch_update times.
+    Uses the runs' recorded configurations if given, and otherwise the
+    fingerprints stored in the records.
+    """
+    if base_config is not None and new_config is not None:
+        strip = lambda config: {k: v for k, v in config.items() if k not in CELL_SELECTION_KEYS}
+        differences = config_differences(strip(base_config), strip(new_config))
+        if differences:
+            return [f"The runs were made with different settings: {d}" for d in differences]
+    fingerprints = lambda records: {r.get("config_fingerprint") for r in records}
+    if fingerprints(base_records) != fingerprints(new_records):
+        return ["The runs' cells were measured with a different seed, update count, timing or Zipf exponent."]
+    return []
+
+def compare_runs(
+    base_records: list[dict[str, Any]],
+    new_records: list[dict[str, Any]],
+    alpha: float = DEFAULT_ALPHA,
+    time_threshold: float = DEFAULT_TIME_THRESHOLD,
+    size_threshold: float = DEFAULT_SIZE_THRESHOLD,
+) -> list[dict[str, Any]]:
+    """
+    Diffs two runs cell by cell, for every (scheme, state size) present in both.
+    Each operation's pooled samples are compared by median and tested with
+    Mann-Whitney U; a change is flagged only if it is both significant and
+    larger than `time_threshold`. Proof sizes are compared by median.
+
+    :return: One row per (scheme, state size, metric).
+    """
+    base, new = _group(base_records), _group(new_records)
+    rows = []
+    for key in sorted(base.keys() & new.keys()):
+        scheme, size = key
+        for op in OPERATIONS:
+            base_samples = [t for r in base[key] for t in r.get("samples", {}).get(op, [])]
+            new_samples = [t for r in new[key] for t in r.get("samples", {}).get(op, [])]
+            if not base_samples or not new_samples:
+                continue
+            base_median = float(np.median(base_samples))
+            new_median = float(np.median(new_samples))
+            ratio = new_median / base_median if base_median > 0 else math.inf
+            p_value = mann_whitney_u(base_samples, new_samples)
+            significant = p_value < alpha
+            rows.append({
+                "scheme": scheme, "state_size": size, "metric": op,
+                "base": base_median, "new": new_median, "ratio": ratio, "p_value": p_value,
+                "regression": significant and ratio > 1 + time_threshold,
+                "improvement": significant and ratio < 1 - time_threshold,
+            })
+
+        base_size = float(np.median([r["proof_size"] for r in base[key]]))
+        new_size = float(np.median([r["proof_size"] for r in new[key]]))
+        size_ratio = new_size / base_size if base_size > 0 else (1.0 if new_size == 0 else math.inf)
+        rows.append({
+            "scheme": scheme, "state_size": size, "metric": "proof_size",
+            "base": base_size, "new": new_size, "ratio": size_ratio, "p_value": None,
+            "regression": new_size > base_size * (1 + size_threshold),
+            "improvement": new_size < base_size,
+        })
+    return rows
+
+def write_report(
+    rows: list[dict[str, Any]], output_dir: str, base_id: str, new_id: str, warnings: list[str] | None = None
+) -> str:
+    """
+    Writes a Markdown report and a ratio chart into `output_dir`.
+    `warnings` (see config_warnings) are listed above the table.
+
+    :return: The path of the Markdown report.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    regressions = [r for r in rows if r["regression"]]
+    improvements = [r for r in rows if r["improvement"]]
+
+    def fmt(value: float, metric: str) -> str:
+        return f"{value:.0f} B" if metric == "proof_size" else f"{value:.3e} s"
+
+    lines = [
+        f"# Benchmark comparison: `{base_id}` -> `{new_id}`",
+        "",
+        f"{len(rows)} cells compared, {len(regressions)} regressions, {len(improvements)} improvements.",
+        "",
+        *[f"> **Warning:** {w}" for w in warnings or []],
+        *([""] if warnings else []),
+        "| Scheme | N | Metric | Base | New | Ratio | p-value | Status |",
+        "|---|---:|---|---:|---:|---:|---:|---|",
+    ]
+    for r in rows:
+        status = "REGRESSION" if r["regression"] else ("improved" if r["improvement"] else "")
+        p_value = "" if r["p_value"] is None else f"{r['p_value']:.3g}"
+        lines.append(
+            f"| {r['scheme']} | {r['state_size']} | {r['metric']} | {fmt(r['base'], r['metric'])} "
+            f"| {fmt(r['new'], r['metric'])} | {r['ratio']:.3f} | {p_value} | {status} |"
+        )
+
+    report_path = os.path.join(output_dir, "report.md")
+    with open(report_path, "w", encoding="utf-8") as f:
+        f.write("\n".join(lines) + "\n")
+    plot_comparison(rows, os.path.join(output_dir, "comparison.png"))
+    return report_path
@@ -0,0 +1,112 @@
+import json
+import os
+import secrets
+import subprocess
+from datetime import datetime, timezone
+from typing import Any
+
+from .storage import ConfigMismatchError, ResultStore
+
+DEFAULT_HISTORY_DIR = "experiment/runs"
+
+class RunHistory:
+    """
+    A directory of benchmark runs, one sub-directory per run:
+        <base_dir>/<run_id>/results.jsonl   raw per-cell records (a ResultStore)
+        <base_dir>/<run_id>/meta.json       when, where and how the run was made
+    Run ids start with a UTC timestamp, so the latest run is simply the last one
+    (runs started within the same second are ordered arbitrarily).
+    """
+
+    def __init__(self, base_dir: str = DEFAULT_HISTORY_DIR):
+        self.base_dir = base_dir
+
+    @staticmethod
+    def new_run_id() -> str:
+        # The random suffix keeps runs started within the same second apart.
+        return datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ") + "-" + secrets.token_hex(3)
+
+    def run_dir(self, run_id: str) -> str:
+        return os.path.join(self.base_dir, run_id)
+
+    def results_path(self, run_id: str) -> str:
+        return os.path.join(self.run_dir(run_id), "results.jsonl")
+
+    def list_runs(self) -> list[str]:
+        """Returns the ids of all runs that have stored results, oldest first."""
+        if not os.path.isdir(self.base_dir):
+            return []
+        return sorted(
+            run_id for run_id in os.listdir(self.base_dir)
+            if os.path.exists(self.results_path(run_id))
+        )
+
+    def resolve(self, run_ref: str) -> str:
+        """
+        Resolves a run reference: a run id, 'latest', 'previous', or a negative
+        index such as '-3' (third most recent).
+        """
+        runs = self.list_runs()
+        aliases = {"latest": "-1", "previous": "-2"}
+        ref = aliases.get(run_ref, run_ref)
+        if ref.startswith("-") and ref[1:].isdigit():
+            idx = int(ref)
+            if -idx > len(runs):
+                raise ValueError(f"Only {len(runs)} runs in {self.base_dir!r}; cannot resolve {run_ref!r}.")
+            return runs[idx]
+        if ref not in runs:
+            raise ValueError(f"No run {run_ref!r} in {self.base_dir!r}.")
+        return ref
+
+    def load_records(self, run_id: str) -> list[dict[str, Any]]:
+        return list(ResultStore(self.results_path(run_id)))
+
+    def load_meta(self, run_id: str) -> dict[str, Any]:
+        path = os.path.join(self.run_dir(run_id), "meta.json")
+        if not os.path.exists(path):
+            return {}
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def write_meta(self, run_id: str, config: dict[str, Any]):
+        """
+        Records the configuration of a run. Resuming a run requires the same
+        configuration and keeps the original meta.json; a different one raises
+        ConfigMismatchError.
+        """
+        config = json.loads(json.dumps(config))  # Compare in the form stored on disk
+        existing = self.load_meta(run_id)
+        if existing:
+            differences = config_differences(existing.get("config", {}), config)
+            if differences:
+                raise ConfigMismatchError(
+                    f"Run {run_id!r} was made with a different configuration ({'; '.join(differences)}); "
+                    "start a new run instead of resuming it."
+                )
+            return
+        os.makedirs(self.run_dir(run_id), exist_ok=True)
+        meta = {
+            "run_id": run_id,
+            "created": datetime.now(timezone.utc).isoformat(),
+            "git_commit": _git_commit(),
+            "config": config,
+        }
+        with open(os.path.join(self.run_dir(run_id), "meta.json"), "w", encoding="utf-8") as f:
+            json.dump(meta, f, indent=2, sort_keys=True)
+
+def config_differences(base: dict[str, Any], new: dict[str, Any]) -> list[str]:
+    """Lists the settings that differ between two run configurations, as 'key: base -> new'."""
+    return [
+        f"{key}: {base.get(key)!r} -> {new.get(key)!r}"
+        for key in sorted(base.keys() | new.keys())
+        if base.get(key) != new.get(key)
+    ]
+
+def _git_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__))
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
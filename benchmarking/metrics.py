@@ -1,6 +1,66 @@
+import math
 from dataclasses import dataclass, field
 from typing import TypedDict
 
+import numpy as np
+
+# The operations measured for every scheme, in reporting order.
+OPERATIONS = ("create", "update", "batch_update", "prove", "verify", "batch_verify")
+
+@dataclass
+class OperationStats:
+    """
+    Summary statistics for the timed samples of one operation.
+    Times are in seconds per sample; a sample may cover several items
+    (e.g. one batch update of `items_per_sample` elements).
+    """
+    samples: int = 0
+    items_per_sample: int = 1
+    mean: float = 0.0
+    stdev: float = 0.0
+    median: float = 0.0
+    p5: float = 0.0
+    p95: float = 0.0
+    p99: float = 0.0
+    ci_low: float = 0.0  # 95% confidence interval of the median
+    ci_high: float = 0.0
+    ops_per_sec: float = 0.0  # Items per second at the median sample time
+
+    @classmethod
+    def from_samples(cls, samples: list[float], items_per_sample: int = 1) -> "OperationStats":
+        if not samples:
+            return cls(items_per_sample=items_per_sample)
+        data = np.sort(np.asarray(samples, dtype=float))
+        n = len(data)
+        median = float(np.median(data))
+        ci_low, ci_high = median_confidence_interval(data)
+        return cls(
+            samples=n,
+            items_per_sample=items_per_sample,
+            mean=float(np.mean(data)),
+            stdev=float(np.std(data, ddof=1)) if n > 1 else 0.0,
+            median=median,
+            p5=float(np.percentile(data, 5)),
+            p95=float(np.percentile(data, 95)),
+            p99=float(np.percentile(data, 99)),
+            ci_low=ci_low,
+            ci_high=ci_high,
+            ops_per_sec=items_per_sample / median if median > 0 else 0.0
+        )
+
+def median_confidence_interval(sorted_samples: np.ndarray, z: float = 1.96) -> tuple[float, float]:
+    """
+    Distribution-free confidence interval for the median, from order statistics.
+    Timing samples are skewed (long right tail), so no normality is assumed.
+    """
+    n = len(sorted_samples)
+    if n == 0:
+        return 0.0, 0.0
+    half_width = z * math.sqrt(n) / 2
+    lower_rank = max(1, math.floor(n / 2 - half_width))
+    upper_rank = min(n, math.ceil(1 + n / 2 + half_width))
+    return float(sorted_samples[lower_rank - 1]), float(sorted_samples[upper_rank - 1])
+
 @dataclass
 class BenchmarkResults:
     """
@@ -12,6 +72,12 @@ class BenchmarkResults:
     update_time: float = 0.0  # Time to update accumulator
     verifier_time: float = 0.0 # Time to verify one proof
     proof_size: int = 0 # Size of one proof in bytes
+    proof_generation_time: float = 0.0 # Time to generate one proof
+    operations: dict[str, OperationStats] = field(default_factory=dict) # Per-operation breakdown
+    # Per-operation primitive counts (utils.instrumentation), averaged per call:
+    # operation -> primitive -> {calls, time, units, max_units}
+    instrumentation: dict[str, dict[str, dict[str, float]]] = field(default_factory=dict)
+    peak_memory_bytes: int = 0 # Peak traced memory of a cell, if traced
 
 class ExperimentResults(TypedDict):
     """
@@ -21,4 +87,41 @@ class ExperimentResults(TypedDict):
     merkle: list[BenchmarkResults]
     rsa: list[BenchmarkResults]
     hybrid: list[BenchmarkResults]
-    verkle: list[BenchmarkResults] 
\ No newline at end of file
+    verkle: list[BenchmarkResults]
+
+def format_summary(results: ExperimentResults) -> str:
+    """
+    Renders the per-operation breakdown of all results as a plain-text table.
+    """
+    header = f"{'Scheme':<22}{'N':>8}  {'Operation':<13}{'n':>4}{'median (s)':>13}{'95% CI':>25}{'p95 (s)':>12}{'ops/s':>12}"
+    lines = [header, "-" * len(header)]
+    for scheme_results in results.values():
+        for r in scheme_results:
+            for op in OPERATIONS:
+                stats = r.operations.get(op)
+                if stats is None:
+                    continue
+                ci = f"[{stats.ci_low:.3e}, {stats.ci_high:.3e}]"
+                lines.append(
+                    f"{r.scheme_name:<22}{r.state_size:>8}  {op:<13}{stats.samples:>4}"
+                    f"{stats.median:>13.3e}{ci:>25}{stats.p95:>12.3e}{stats.ops_per_sec:>12.1f}"
+                )
+    return "\n".join(lines)
+
+def format_instrumentation(results: ExperimentResults) -> str:
+    """
+    Renders the per-operation primitive counts of all results as a plain-text table.
+    Units are bytes hashed, primes generated, multiplications or exponent bits.
+    """
+    header = f"{'Scheme':<22}{'N':>8}  {'Operation':<13}{'Primitive':<23}{'calls':>10}{'time (s)':>12}{'units':>14}{'max':>10}"
+    lines = [header, "-" * len(header)]
+    for scheme_results in results.values():
+        for r in scheme_results:
+            ops = sorted(r.instrumentation, key=lambda op: OPERATIONS.index(op) if op in OPERATIONS else len(OPERATIONS))
+            for op in ops:
+                for primitive, s in sorted(r.instrumentation[op].items()):
+                    lines.append(
+                        f"{r.scheme_name:<22}{r.state_size:>8}  {op:<13}{primitive:<23}"
+                        f"{s['calls']:>10.1f}{s['time']:>12.3e}{s['units']:>14.1f}{s['max_units']:>10}"
+                    )
+    return "\n".join(lines)
@@ -1,77 +1,90 @@
+import os
 import matplotlib.pyplot as plt
 import numpy as np
 from .metrics import ExperimentResults
 
-def plot_results(results: ExperimentResults):
+DEFAULT_OUTPUT_DIR = "experiment"
+
+def _select_backend(show: bool):
     """
-    Generates and saves plots for the benchmark results.
+    Renders straight to files unless figures are to be shown, so headless
+    runs never block. With `show`, matplotlib's own backend choice is kept
+    (it falls back to a non-interactive one where there is no display).
     """
-    schemes = list(results.keys())
-    
-    # --- Plot 1: Proof Size vs. State Size ---
+    if not show:
+        plt.switch_backend("Agg")
+
+def _plot_metric(results: ExperimentResults, attr: str, label: str, ylabel: str, title: str,
+                 path: str, show: bool, ylog: bool = True):
     plt.figure(figsize=(10, 6))
-    for scheme in schemes:
+    for scheme in results.keys():
         state_sizes = [r.state_size for r in results[scheme]]
-        proof_sizes = [r.proof_size for r in results[scheme]]
-        plt.plot(state_sizes, proof_sizes, marker='o', linestyle='-', label=f"{scheme.capitalize()} Proof Size")
-    
+        values = [getattr(r, attr) for r in results[scheme]]
+        plt.plot(state_sizes, values, marker='o', linestyle='-', label=f"{scheme.capitalize()} {label}")
+
     plt.xlabel("Number of Elements in State (N)")
-    plt.ylabel("Proof Size (bytes)")
-    plt.title("Proof Size vs. State Size")
+    plt.ylabel(ylabel)
+    plt.title(title)
     plt.legend()
     plt.grid(True)
     plt.xscale('log') # State size often grows exponentially
-    plt.yscale('log') # Proof size can also have log scaling
-    plt.savefig("experiment/proof_size_vs_state_size.png")
-    plt.show()
+    if ylog:
+        plt.yscale('log')
+    plt.savefig(path)
+    if show:
+        plt.show()
+    plt.close()
 
-    # --- Plot 2: Prover Creation Time vs. State Size ---
-    plt.figure(figsize=(10, 6))
-    for scheme in schemes:
-        state_sizes = [r.state_size for r in results[scheme]]
-        prover_times = [r.prover_time for r in results[scheme]]
-        plt.plot(state_sizes, prover_times, marker='o', linestyle='-', label=f"{scheme.capitalize()} Creation Time")
+def plot_results(results: ExperimentResults, output_dir: str = DEFAULT_OUTPUT_DIR, show: bool = False):
+    """
+    Generates and saves plots for the benchmark results.
 
-    plt.xlabel("Number of Elements in State (N)")
-    plt.ylabel("Prover Creation Time (seconds)")
-    plt.title("Prover Creation Time vs. State Size")
-    plt.legend()
-    plt.grid(True)
-    plt.xscale('log')
-    plt.yscale('log')
-    plt.savefig("experiment/prover_creation_time_vs_state_size.png")
-    plt.show()
+    :param output_dir: Directory the PNGs are written to (created if missing).
+    :param show: Also open each figure interactively (blocks until closed).
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    _select_backend(show)
 
-    # --- Plot 3: Prover Update Time vs. State Size ---
-    plt.figure(figsize=(10, 6))
-    for scheme in schemes:
-        state_sizes = [r.state_size for r in results[scheme]]
-        update_times = [r.update_time for r in results[scheme]]
-        plt.plot(state_sizes, update_times, marker='o', linestyle='-', label=f"{scheme.capitalize()} Update Time")
+    # --- Plot 1: Proof Size vs. State Size ---
+    _plot_metric(results, "proof_size", "Proof Size", "Proof Size (bytes)",
+                 "Proof Size vs. State Size",
+                 os.path.join(output_dir, "proof_size_vs_state_size.png"), show)
 
-    plt.xlabel("Number of Elements in State (N)")
-    plt.ylabel("Prover Update Time (seconds)")
-    plt.title("Prover Update Time (for 10% state change) vs. State Size")
-    plt.legend()
-    plt.grid(True)
-    plt.xscale('log')
-    plt.yscale('log')
-    plt.savefig("experiment/prover_update_time_vs_state_size.png")
-    plt.show()
+    # --- Plot 2: Prover Creation Time vs. State Size ---
+    _plot_metric(results, "prover_time", "Creation Time", "Prover Creation Time (seconds)",
+                 "Prover Creation Time vs. State Size",
+                 os.path.join(output_dir, "prover_creation_time_vs_state_size.png"), show)
+
+    # --- Plot 3: Prover Update Time vs. State Size ---
+    _plot_metric(results, "update_time", "Update Time", "Prover Update Time (seconds)",
+                 "Prover Update Time (per element of a batch) vs. State Size",
+                 os.path.join(output_dir, "prover_update_time_vs_state_size.png"), show)
 
     # --- Plot 4: Verifier Time vs. State Size ---
-    plt.figure(figsize=(10, 6))
-    for scheme in schemes:
-        state_sizes = [r.state_size for r in results[scheme]]
-        verifier_times = [r.verifier_time for r in results[scheme]]
-        plt.plot(state_sizes, verifier_times, marker='o', linestyle='-', label=f"{scheme.capitalize()} Verifier Time")
+    # Verifier time might be constant, log scale might not be best
+    _plot_metric(results, "verifier_time", "Verifier Time", "Verifier Time (seconds)",
+                 "Verifier Time vs. State Size",
+                 os.path.join(output_dir, "verifier_time_vs_state_size.png"), show, ylog=False)
 
-    plt.xlabel("Number of Elements in State (N)")
-    plt.ylabel("Verifier Time (seconds)")
-    plt.title("Verifier Time vs. State Size")
-    plt.legend()
-    plt.grid(True)
-    plt.xscale('log')
-    # plt.yscale('log') # Verifier time might be constant, log scale might not be best
-    plt.savefig("experiment/verifier_time_vs_state_size.png")
-    plt.show() 
\ No newline at end of file
+def plot_comparison(rows: list[dict], path: str):
+    """
+    Saves a bar chart of new/base median ratios for every compared cell.
+    Bars above 1.0 are slowdowns; flagged regressions are drawn in red.
+    """
+    if not rows:
+        return
+    _select_backend(show=False)
+    labels = [f"{r['scheme']} N={r['state_size']} {r['metric']}" for r in rows]
+    ratios = [r["ratio"] for r in rows]
+    colors = ["tab:red" if r["regression"] else ("tab:green" if r["improvement"] else "tab:gray") for r in rows]
+
+    plt.figure(figsize=(10, max(4, 0.25 * len(rows))))
+    y = np.arange(len(rows))
+    plt.barh(y, ratios, color=colors)
+    plt.axvline(1.0, color="black", linewidth=0.8)
+    plt.yticks(y, labels, fontsize=7)
+    plt.xlabel("New / Base (median)")
+    plt.title("Benchmark Comparison")
+    plt.tight_layout()
+    plt.savefig(path)
+    plt.close()
@@ -0,0 +1,98 @@
+import cProfile
+import os
+import tracemalloc
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Any, Callable, Iterator
+
+from utils import instrumentation
+
+@dataclass(frozen=True)
+class ProfilingConfig:
+    """
+    Optional diagnostics collected per benchmark cell. All of them perturb the
+    measured times, so leave them off for runs used in comparisons.
+    - instrument: count and time the primitives in utils.crypto per operation.
+    - profile_dir: write a cProfile .prof file per cell into this directory.
+    - trace_memory: record the peak traced memory of the cell (tracemalloc).
+    """
+    instrument: bool = False
+    profile_dir: str | None = None
+    trace_memory: bool = False
+
+def scoped(config: ProfilingConfig, op: str, fn: Callable[[Any], Any]) -> Callable[[Any], Any]:
+    """
+    Wraps `fn` so its primitive calls are attributed to operation `op`.
+    Returns `fn` itself when instrumentation is off, so timings are untouched.
+    """
+    if not config.instrument:
+        return fn
+    def call(arg):
+        with instrumentation.scope(op):
+            return fn(arg)
+    return call
+
+@contextmanager
+def profile_cell(config: ProfilingConfig, cell_name: str) -> Iterator[dict[str, Any]]:
+    """
+    Collects the configured diagnostics around one cell. Yields a dictionary
+    that is filled in on exit and is meant to be merged into the cell record.
+    """
+    extras: dict[str, Any] = {}
+    profiler = None
+    if config.trace_memory:
+        tracemalloc.start()
+    if config.profile_dir:
+        profiler = cProfile.Profile()
+        profiler.enable()
+    try:
+        if config.instrument:
+            with instrumentation.capture() as stats:
+                yield extras
+            extras["instrumentation"] = stats.snapshot()
+        else:
+            yield extras
+    finally:
+        if profiler is not None:
+            profiler.disable()
+            os.makedirs(config.profile_dir, exist_ok=True)
+            path = os.path.join(config.profile_dir, f"{cell_name}.prof")
+            profiler.dump_stats(path)
+            extras["profile_path"] = path
+        if config.trace_memory:
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            extras["peak_memory_bytes"] = peak
+
+def aggregate_instrumentation(snapshots: list[dict[str, Any]]) -> dict[str, dict[str, dict[str, float]]]:
+    """
+    Pools instrumentation snapshots of several runs into per-invocation
+    averages: operation -> primitive -> {calls, time, units, max_units}.
+    """
+    totals: dict[str, dict[str, dict[str, float]]] = {}
+    invocations: dict[str, int] = {}
+    for snapshot in snapshots:
+        for op, data in snapshot.items():
+            invocations[op] = invocations.get(op, 0) + data["invocations"]
+            for primitive, s in data["primitives"].items():
+                t = totals.setdefault(op, {}).setdefault(
+                    primitive, {"calls": 0, "time": 0.0, "units": 0, "max_units": 0})
+                t["calls"] += s["calls"]
+                t["time"] += s["time"]
+                t["units"] += s["units"]
+                t["max_units"] = max(t["max_units"], s["max_units"])
+
+    averages = {}
+    for op, primitives in totals.items():
+        # Work outside any scope (e.g. scheme construction) is reported as totals.
+        n = invocations.get(op) or 1
+        averages[op] = {
+            primitive: {
+                "calls": t["calls"] / n,
+                "time": t["time"] / n,
+                "units": t["units"] / n,
+                "max_units": t["max_units"],
+            }
+            for primitive, t in primitives.items()
+        }
+    return averages
@@ -1,119 +1,387 @@
-import random
-import time
+import dataclasses
+import json
+import multiprocessing
+import os
+import re
+import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Any
 from tqdm import tqdm
 import numpy as np
 
+from schemes import rsa_accumulator
 from schemes.base_scheme import AccumulatorScheme
 from schemes.merkle import MerkleTree
 from schemes.rsa_accumulator import RsaAccumulator, RsaAccumulatorTrapdoored
 from schemes.hybrid import HybridScheme
 from schemes.verkle import VerkleTree
 from simulation.simulator import generate_random_state
-from .metrics import BenchmarkResults, ExperimentResults
+from simulation.workload import Block, UpdateKind, Workload, WorkloadConfig
+from utils.crypto import get_hash, bytes_to_int
+from .metrics import BenchmarkResults, ExperimentResults, OperationStats, OPERATIONS
+from .profiling import ProfilingConfig, aggregate_instrumentation, profile_cell, scoped
+from .storage import ConfigMismatchError, ResultStore
+from .timing import TimingConfig, measure
 
-def run_benchmark():
+# NOTE: state_sizes is currently small for quick tests.
+# To reproduce paper results, use: [100, 1000, 5000, 10000, 50000]
+DEFAULT_STATE_SIZES = [100, 500, 1000]
+DEFAULT_NUM_RUNS = 5
+# NOTE: The paper mentions updating 10% of the state. This implementation uses
+# a fixed number of updates. This will affect results for larger state sizes.
+# To match the paper, you could use: num_updates = int(size * 0.1)
+FIXED_UPDATES = 100  # Max updates per run (or less if state smaller)
+DEFAULT_SEED = 0
+BATCH_VERIFY_SIZE = 16  # Proofs verified per batch-verify sample
+DEFAULT_TIMING = TimingConfig()
+DEFAULT_PROFILING = ProfilingConfig()
+DEFAULT_ZIPF_EXPONENT = 0.0  # Uniform key access
+
+SCHEMES_TO_TEST: dict[str, type[AccumulatorScheme]] = {
+    "Merkle Tree": MerkleTree,
+    "RSA (Trapdoor-free)": RsaAccumulator,
+    "RSA (Batched)": RsaAccumulatorTrapdoored,
+    "Hybrid": HybridScheme,
+    "Verkle": VerkleTree
+}
+
+# Short names accepted on the command line.
+SCHEME_ALIASES = {
+    "merkle": "Merkle Tree",
+    "rsa": "RSA (Trapdoor-free)",
+    "rsa-batched": "RSA (Batched)",
+    "hybrid": "Hybrid",
+    "verkle": "Verkle",
+}
+
+def resolve_scheme_name(name: str) -> str:
+    """Maps a command-line alias or a full scheme name to the full scheme name."""
+    if name in SCHEMES_TO_TEST:
+        return name
+    if name.lower() in SCHEME_ALIASES:
+        return SCHEME_ALIASES[name.lower()]
+    raise ValueError(f"Unknown scheme: {name!r}. Choose from {', '.join(SCHEME_ALIASES)}.")
+
+def cell_seed(base_seed: int, name: str, size: int, run: int) -> int:
+    """Derives a stable per-cell seed, independent of scheduling order."""
+    return bytes_to_int(get_hash(f"{base_seed}/{name}/{size}/{run}".encode())[:8])
+
+def config_fingerprint(seed: int, num_updates: int, timing: TimingConfig, zipf_exponent: float) -> str:
     """
-    Runs the full benchmark suite for all schemes and state sizes.
+    Identifies the settings that change what a cell measures. Stored cells are
+    reused only by a run with the same fingerprint.
+    """
+    config = {
+        "seed": seed,
+        "num_updates": num_updates,
+        "timing": {key: float(value) for key, value in dataclasses.asdict(timing).items()},
+        "zipf_exponent": float(zipf_exponent),
+    }
+    return get_hash(json.dumps(config, sort_keys=True).encode()).hex()[:16]
+
+def _init_worker(cpu_queue, rsa_setup: tuple[int, int, int]):
+    """
+    Process pool initializer. Installs the parent's simulated RSA setup, so
+    all workers share one modulus even when they are spawned rather than
+    forked, and pins the worker to its own CPU if a queue is given.
     """
-    # NOTE: state_sizes is currently small for quick tests. 
-    # To reproduce paper results, use: [100, 1000, 5000, 10000, 50000]
-    state_sizes = [100, 500, 1000] 
-    num_runs = 5
-    # NOTE: The paper mentions updating 10% of the state. This implementation uses
-    # a fixed number of updates. This will affect results for larger state sizes.
-    # To match the paper, you could use: num_updates = int(size * 0.1)
-    FIXED_UPDATES = 100  # Max updates per run (or less if state smaller)
-    
-    schemes_to_test = {
-        "Merkle Tree": MerkleTree,
-        "RSA (Trapdoor-free)": RsaAccumulator,
-        "RSA (Batched)": RsaAccumulatorTrapdoored,
-        "Hybrid": HybridScheme,
-        "Verkle (Simulated)": VerkleTree
+    rsa_accumulator.N, rsa_accumulator.G, rsa_accumulator.PHI_N = rsa_setup
+    if cpu_queue is not None:
+        _pin_worker(cpu_queue)
+
+def _pin_worker(cpu_queue):
+    """Pins the calling worker to its own CPU, if supported."""
+    if not hasattr(os, "sched_setaffinity"):
+        return
+    try:
+        cpu = cpu_queue.get_nowait()
+    except Exception:
+        return
+    os.sched_setaffinity(0, {cpu})
+
+def apply_block(scheme: AccumulatorScheme, block: Block):
+    """
+    Applies a block of workload updates to a scheme. The trapdoored RSA
+    accumulator takes the whole block as one batch; the other schemes apply
+    replacements one by one and cannot insert or delete.
+    """
+    if isinstance(scheme, RsaAccumulatorTrapdoored):
+        scheme.batch_update(
+            additions=[u.new for u in block if u.new is not None],
+            deletions=[u.old for u in block if u.old is not None],
+        )
+        return
+    for u in block:
+        if u.kind != UpdateKind.REPLACE:
+            raise ValueError(f"{type(scheme).__name__} supports replacements only, got {u.kind.name}.")
+        scheme.update(u.old, u.new)
+
+def run_cell(
+    name: str,
+    size: int,
+    run: int,
+    seed: int,
+    num_updates: int = FIXED_UPDATES,
+    timing: TimingConfig = DEFAULT_TIMING,
+    profiling: ProfilingConfig = DEFAULT_PROFILING,
+    zipf_exponent: float = DEFAULT_ZIPF_EXPONENT,
+) -> dict[str, Any]:
+    """
+    Runs one (scheme, state size, run) measurement and returns it as a record.
+    All randomness is drawn from `seed`, so a cell is reproducible on its own.
+
+    Every operation in OPERATIONS is sampled separately with warmup and
+    repetitions (see TimingConfig); the raw samples are kept in the record
+    so statistics can be pooled across runs. Batch operations time one whole
+    batch per sample: `num_updates` updates, or BATCH_VERIFY_SIZE verifications.
+    Prove samples that return no proof are dropped and counted in
+    `prove_failures`; proofs of the verify batch that fail are counted in
+    `verify_failures`. Either makes the cell invalid.
+    Updated and proven elements are drawn from a seeded Workload whose key
+    popularity follows a Zipf law with `zipf_exponent` (0 is uniform).
+    Diagnostics enabled in `profiling` are added to the record.
+    """
+    cell_name = f"{re.sub(r'[^a-z0-9]+', '_', name.lower()).strip('_')}-n{size}-r{run}"
+    with profile_cell(profiling, cell_name) as extras:
+        record = _measure_cell(name, size, run, seed, num_updates, timing, profiling, zipf_exponent)
+    record.update(extras)
+    return record
+
+def _measure_cell(
+    name: str,
+    size: int,
+    run: int,
+    seed: int,
+    num_updates: int,
+    timing: TimingConfig,
+    profiling: ProfilingConfig,
+    zipf_exponent: float,
+) -> dict[str, Any]:
+    # The schemes support replacements only, so the workload has no inserts or deletes.
+    workload = Workload(WorkloadConfig(initial_size=size, zipf_exponent=zipf_exponent, seed=seed))
+    scheme_class = SCHEMES_TO_TEST[name]
+    initial_state = list(workload.initial_state())
+    samples: dict[str, list[float]] = {}
+    items_per_sample = {op: 1 for op in OPERATIONS}
+
+    # --- Create: every sample builds a fresh scheme over the same state ---
+    scheme: AccumulatorScheme | None = None
+    def fresh_scheme():
+        nonlocal scheme
+        scheme = None # Release the previous instance before building the next one
+        scheme = scheme_class(list(initial_state))
+    samples["create"] = measure(scoped(profiling, "create", lambda _: scheme.create()), timing, setup=fresh_scheme)
+
+    # --- Single and batch updates ---
+    num_updates = min(num_updates, size)
+    if num_updates > 0:
+        samples["update"] = measure(
+            scoped(profiling, "update", lambda block: apply_block(scheme, block)),
+            timing, setup=lambda: workload.next_block(1)
+        )
+        samples["batch_update"] = measure(
+            scoped(profiling, "batch_update", lambda block: apply_block(scheme, block)),
+            timing, setup=lambda: workload.next_block(num_updates)
+        )
+        items_per_sample["batch_update"] = num_updates
+
+    # --- Prove, verify and batch verify ---
+    def pick_element() -> bytes:
+        return workload.sample_live_element() if size else generate_random_state(1, seed=seed)[0]
+
+    # A prove that returns None did not produce a proof, so its time is not a
+    # proof generation time: such samples are dropped and counted instead.
+    proved: list[bool] = []
+    def prove(element: bytes):
+        proved.append(scheme.prove_membership(element) is not None)
+    prove_samples = measure(scoped(profiling, "prove", prove), timing, setup=pick_element)
+    sample_proved = proved[len(proved) - len(prove_samples):]
+    prove_failures = sample_proved.count(False)
+    prove_samples = [t for t, ok in zip(prove_samples, sample_proved) if ok]
+    if prove_samples:
+        samples["prove"] = prove_samples
+
+    element_to_prove = pick_element()
+    proof = scheme.prove_membership(element_to_prove)
+    is_valid = proof is not None and scheme.verify_membership(element_to_prove, proof) and not prove_failures
+    if proof is not None:
+        samples["verify"] = measure(
+            scoped(profiling, "verify", lambda _: scheme.verify_membership(element_to_prove, proof)), timing
+        )
+
+    batch = [(e, scheme.prove_membership(e)) for e in (pick_element() for _ in range(min(BATCH_VERIFY_SIZE, size)))]
+    batch = [(e, p) for e, p in batch if p is not None]
+    # Every proof of the batch is verified, so a failure neither shortens the
+    # timed batch nor goes unnoticed. Verification is deterministic, so the
+    # count of the last sample holds for all of them.
+    verify_failures = 0
+    def verify_batch(_):
+        nonlocal verify_failures
+        failures = 0
+        for e, p in batch:
+            if not scheme.verify_membership(e, p):
+                failures += 1
+        verify_failures = failures
+    if batch:
+        samples["batch_verify"] = measure(scoped(profiling, "batch_verify", verify_batch), timing)
+        items_per_sample["batch_verify"] = len(batch)
+    is_valid = is_valid and not verify_failures
+
+    def median_of(op: str, per_item: bool = False) -> float:
+        if not samples.get(op):
+            return 0.0
+        value = float(np.median(samples[op]))
+        return value / items_per_sample[op] if per_item else value
+
+    return {
+        "scheme": name,
+        "state_size": size,
+        "run": run,
+        "seed": seed,
+        "zipf_exponent": zipf_exponent,
+        "creation_time": median_of("create"),
+        # Amortized per element over one batch of `num_updates` updates.
+        "update_time": median_of("batch_update", per_item=True),
+        "prover_time": median_of("prove"),
+        "verifier_time": median_of("verify"),
+        "proof_size": scheme.get_proof_size(proof),
+        "valid": is_valid,
+        "prove_failures": prove_failures,
+        "verify_failures": verify_failures,
+        "samples": samples,
+        "items_per_sample": {op: items_per_sample[op] for op in samples},
     }
 
-    all_results: ExperimentResults = { name: [] for name in schemes_to_test.keys() }
+def aggregate_records(records: list[dict[str, Any]], schemes: list[str], state_sizes: list[int]) -> ExperimentResults:
+    """
+    Combines the per-run records of each (scheme, state size) cell into BenchmarkResults.
+    Headline times are medians over runs; the per-operation breakdown pools the
+    raw samples of all runs before computing statistics.
+    """
+    grouped: dict[tuple[str, int], list[dict[str, Any]]] = {}
+    for record in records:
+        grouped.setdefault((record["scheme"], record["state_size"]), []).append(record)
 
-    with tqdm(total=len(schemes_to_test) * len(state_sizes), desc="Running Benchmarks") as pbar:
+    all_results: ExperimentResults = { name: [] for name in schemes }
+    for name in schemes:
         for size in state_sizes:
-            for name, scheme_class in schemes_to_test.items():
-                # Skip the slow trapdoor-free RSA for large states to save time
-                if name == "RSA (Trapdoor-free)" and size > 5000:
-                    pbar.update(1)
-                    continue
+            runs = grouped.get((name, size))
+            if not runs:
+                continue
+            operations = {}
+            for op in OPERATIONS:
+                pooled = [t for r in runs for t in r.get("samples", {}).get(op, [])]
+                if pooled:
+                    items = runs[0].get("items_per_sample", {}).get(op, 1)
+                    operations[op] = OperationStats.from_samples(pooled, items)
+            all_results[name].append(BenchmarkResults(
+                scheme_name=name,
+                state_size=size,
+                prover_time=float(np.median([r["creation_time"] for r in runs])),
+                update_time=float(np.median([r["update_time"] for r in runs])),
+                verifier_time=float(np.median([r["verifier_time"] for r in runs])),
+                proof_size=float(np.median([r["proof_size"] for r in runs])),
+                proof_generation_time=float(np.median([r["prover_time"] for r in runs])),
+                operations=operations,
+                instrumentation=aggregate_instrumentation([r["instrumentation"] for r in runs if "instrumentation" in r]),
+                peak_memory_bytes=max((r.get("peak_memory_bytes", 0) for r in runs), default=0)
+            ))
+    return all_results
 
+def run_benchmark(
+    state_sizes: list[int] | None = None,
+    schemes: list[str] | None = None,
+    num_runs: int = DEFAULT_NUM_RUNS,
+    num_updates: int = FIXED_UPDATES,
+    workers: int | None = None,
+    seed: int = DEFAULT_SEED,
+    results_path: str | None = None,
+    pin_cpus: bool = True,
+    timing: TimingConfig = DEFAULT_TIMING,
+    profiling: ProfilingConfig = DEFAULT_PROFILING,
+    zipf_exponent: float = DEFAULT_ZIPF_EXPONENT,
+) -> ExperimentResults:
+    """
+    Runs the full benchmark suite for all schemes and state sizes.
+
+    Every (scheme, size, run) cell is independent and seeded, so cells are
+    spread across a process pool. If `results_path` is given, each finished
+    cell is appended to a JSON Lines store, and cells already in the store
+    are skipped, which makes an interrupted sweep resumable. A store written
+    with a different seed, update count, timing or Zipf exponent is refused
+    with a ConfigMismatchError rather than mixed with the new results.
+
+    :param workers: Number of worker processes; 1 runs everything in-process.
+    :param pin_cpus: Pin each worker to its own CPU to reduce timing noise.
+    :param timing: Warmup and repetition settings for every operation.
+    :param profiling: Optional per-cell instrumentation, cProfile and tracemalloc.
+    :param zipf_exponent: Skew of the keys updated and proven; 0 is uniform.
+    """
+    state_sizes = state_sizes or DEFAULT_STATE_SIZES
+    schemes = [resolve_scheme_name(s) for s in schemes] if schemes else list(SCHEMES_TO_TEST)
+    if workers is None:
+        workers = len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else (os.cpu_count() or 1)
+
+    fingerprint = config_fingerprint(seed, num_updates, timing, zipf_exponent)
+    store = ResultStore(results_path) if results_path else None
+    stored = list(store) if store else []
+    mismatched = sum(1 for r in stored if r.get("config_fingerprint") != fingerprint)
+    if mismatched:
+        raise ConfigMismatchError(
+            f"{results_path!r} holds {mismatched} cells measured with a different seed, update count, "
+            "timing or Zipf exponent; cannot resume it with this configuration."
+        )
+    completed = store.completed() if store else set()
+    records = [r for r in stored if r["run"] < num_runs]
+
+    cells = []
+    for size in state_sizes:
+        for name in schemes:
+            # Skip the slow trapdoor-free RSA for large states to save time
+            if name == "RSA (Trapdoor-free)" and size > 5000:
+                continue
+            for run in range(num_runs):
+                if (name, size, run, fingerprint) not in completed:
+                    cells.append((name, size, run, cell_seed(seed, name, size, run)))
+
+    def _finish(record: dict[str, Any]):
+        record["config_fingerprint"] = fingerprint
+        if record.get("prove_failures"):
+            print(f"WARNING: {record['prove_failures']} prove samples returned no proof for {record['scheme']} "
+                  f"with state size {record['state_size']}; they are excluded from the prove timings")
+        if record.get("verify_failures"):
+            print(f"WARNING: {record['verify_failures']} proofs of the verify batch failed for {record['scheme']} "
+                  f"with state size {record['state_size']}")
+        if not record["valid"]:
+            print(f"WARNING: Verification failed for {record['scheme']} with state size {record['state_size']}")
+        if store:
+            store.append(record)
+        records.append(record)
+
+    with tqdm(total=len(cells), desc="Running Benchmarks") as pbar:
+        if workers <= 1:
+            for name, size, run, seed_ in cells:
                 pbar.set_description(f"Benchmarking {name} (N={size})")
-                
-                run_creation_times, run_update_times, run_verifier_times, run_proof_sizes = [], [], [], []
-                # NOTE: `prover_time` (for proof generation) is measured below but not stored in the final results.
-                # The final result's 'prover_time' is actually the creation time.
-                run_prover_times = []
-
-                for i in range(num_runs):
-                    initial_state = generate_random_state(size)
-                    
-                    scheme = scheme_class(initial_state)
-                    creation_start_time = time.perf_counter()
-                    scheme.create()
-                    creation_time = time.perf_counter() - creation_start_time
-                    run_creation_times.append(creation_time)
-
-                    num_updates = min(FIXED_UPDATES, size)
-                    if num_updates > 0:
-                        elements_to_update = random.sample(list(scheme.state), num_updates)
-                        
-                        if isinstance(scheme, RsaAccumulatorTrapdoored):
-                            new_elements = [e + b'-updated' for e in elements_to_update]
-                            
-                            batch_update_start_time = time.perf_counter()
-                            scheme.batch_update(additions=new_elements, deletions=elements_to_update)
-                            total_batch_time = time.perf_counter() - batch_update_start_time
-                            
-                            avg_update_time = total_batch_time / num_updates
-                            run_update_times.append(avg_update_time)
-                        else:
-                            total_update_time = 0.0
-                            update_iterator = tqdm(zip(elements_to_update, [e + b'-updated' for e in elements_to_update]), total=num_updates, desc=f"Updating (run {i + 1}/{num_runs})", leave=False)
-                            for old_element, new_element in update_iterator:
-                                update_start_time = time.perf_counter()
-                                scheme.update(old_element, new_element)
-                                total_update_time += time.perf_counter() - update_start_time
-
-                            avg_update_time = total_update_time / num_updates
-                            run_update_times.append(avg_update_time)
-                    else:
-                        run_update_times.append(0)
-
-                    element_to_prove = random.choice(scheme.state) if scheme.state else generate_random_state(1)[0]
-                    
-                    prove_start_time = time.perf_counter()
-                    proof = scheme.prove_membership(element_to_prove)
-                    prover_time = time.perf_counter() - prove_start_time
-                    run_prover_times.append(prover_time)
-                    
-                    verify_start_time = time.perf_counter()
-                    is_valid = False
-                    if proof is not None:
-                        is_valid = scheme.verify_membership(element_to_prove, proof)
-                    verifier_time = time.perf_counter() - verify_start_time
-
-                    if not is_valid and "Verkle" not in name:
-                         print(f"WARNING: Verification failed for {name} with state size {size}")
-
-                    run_verifier_times.append(verifier_time)
-                    
-                    proof_size = scheme.get_proof_size(proof)
-                    run_proof_sizes.append(proof_size)
-
-                result = BenchmarkResults(
-                    scheme_name=name,
-                    state_size=size,
-                    prover_time=np.mean(run_creation_times),
-                    update_time=np.mean(run_update_times),
-                    verifier_time=np.mean(run_verifier_times),
-                    proof_size=np.mean(run_proof_sizes)
-                )
-                all_results[name].append(result)
+                _finish(run_cell(name, size, run, seed_, num_updates, timing, profiling, zipf_exponent))
                 pbar.update(1)
+        else:
+            # Fork is only safe on Linux; elsewhere (e.g. macOS, where system
+            # frameworks may already be loaded) the platform default is used.
+            ctx = multiprocessing.get_context("fork") if sys.platform.startswith("linux") else None
+            cpu_queue = None
+            if pin_cpus and hasattr(os, "sched_getaffinity"):
+                cpu_queue = (ctx or multiprocessing).Queue()
+                for cpu in sorted(os.sched_getaffinity(0))[:workers]:
+                    cpu_queue.put(cpu)
+            with ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=ctx,
+                initializer=_init_worker,
+                initargs=(cpu_queue, (rsa_accumulator.N, rsa_accumulator.G, rsa_accumulator.PHI_N)),
+            ) as pool:
+                futures = [pool.submit(run_cell, name, size, run, seed_, num_updates, timing, profiling, zipf_exponent) for name, size, run, seed_ in cells]
+                for future in as_completed(futures):
+                    _finish(future.result())
+                    pbar.update(1)
 
-    return all_results 
\ No newline at end of file
+    return aggregate_records(records, schemes, state_sizes)
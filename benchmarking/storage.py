@@ -0,0 +1,60 @@
+import json
+import os
+from typing import Any, Iterator
+
+CellKey = tuple[str, int, int, str | None]
+
+class ConfigMismatchError(ValueError):
+    """Raised when stored results were produced by a different configuration."""
+
+class ResultStore:
+    """
+    An append-only JSON Lines store of finished benchmark cells.
+    Each line is one (scheme, state size, run) measurement, written as soon as
+    the cell finishes, so an interrupted sweep can be resumed by skipping the
+    cells already on disk. Records carry the fingerprint of the configuration
+    that produced them, which is part of the cell key.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+
+    @staticmethod
+    def cell_key(record: dict[str, Any]) -> CellKey:
+        return (record["scheme"], record["state_size"], record["run"], record.get("config_fingerprint"))
+
+    def __iter__(self) -> Iterator[dict[str, Any]]:
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    # A crash mid-write can leave a truncated last line; that
+                    # cell is simply treated as not completed.
+                    continue
+
+    def completed(self) -> set[CellKey]:
+        """Returns the keys of all cells already stored."""
+        return {self.cell_key(record) for record in self}
+
+    def append(self, record: dict[str, Any]):
+        """Appends one finished cell and flushes it to disk."""
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        # Terminate a line truncated by a crash, so this record starts on its own line.
+        prefix = ""
+        if os.path.exists(self.path) and os.path.getsize(self.path) > 0:
+            with open(self.path, "rb") as f:
+                f.seek(-1, os.SEEK_END)
+                if f.read(1) != b"\n":
+                    prefix = "\n"
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(prefix + json.dumps(record, sort_keys=True) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
@@ -0,0 +1,46 @@
+import time
+from dataclasses import dataclass
+from typing import Any, Callable
+
+@dataclass(frozen=True)
+class TimingConfig:
+    """
+    Controls how many times each operation is measured.
+    - warmup: untimed calls before sampling (warms caches and the allocator).
+    - min_repeat / max_repeat: bounds on the number of timed samples.
+    - max_time: stop sampling once this many seconds were spent on an operation,
+      as long as min_repeat samples were taken.
+    """
+    warmup: int = 1
+    min_repeat: int = 3
+    max_repeat: int = 30
+    max_time: float = 2.0
+
+def measure(
+    operation: Callable[[Any], Any],
+    config: TimingConfig,
+    setup: Callable[[], Any] | None = None,
+) -> list[float]:
+    """
+    Times `operation` repeatedly and returns the per-call durations in seconds.
+
+    :param operation: Called with the result of `setup` (or None) and timed.
+    :param config: Warmup and repetition settings.
+    :param setup: Optional untimed callable run before every call, e.g. to
+        build a fresh scheme or pick the next element to update.
+    """
+    for _ in range(config.warmup):
+        operation(setup() if setup else None)
+
+    samples = []
+    spent = 0.0
+    while len(samples) < config.max_repeat:
+        if len(samples) >= config.min_repeat and spent >= config.max_time:
+            break
+        arg = setup() if setup else None
+        start = time.perf_counter()
+        operation(arg)
+        elapsed = time.perf_counter() - start
+        samples.append(elapsed)
+        spent += elapsed
+    return samples
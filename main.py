@@ -1,3 +1,4 @@
+import argparse
 import sys
 import os
 
@@ -5,25 +6,207 @@ import os
 # This allows us to import modules from subdirectories
 sys.path.insert(0, os.path.abspath(os.path.dirname(__file__)))
 
-from benchmarking.runner import run_benchmark
+from benchmarking.runner import (
+    run_benchmark, DEFAULT_STATE_SIZES, DEFAULT_NUM_RUNS, DEFAULT_SEED, DEFAULT_TIMING, DEFAULT_ZIPF_EXPONENT,
+    FIXED_UPDATES, SCHEME_ALIASES
+)
+from benchmarking.compare import (
+    compare_runs, config_warnings, write_report, DEFAULT_ALPHA, DEFAULT_TIME_THRESHOLD, DEFAULT_SIZE_THRESHOLD
+)
+from benchmarking.history import RunHistory, DEFAULT_HISTORY_DIR
+from benchmarking.metrics import format_summary, format_instrumentation
+from benchmarking.profiling import ProfilingConfig
+from benchmarking.storage import ConfigMismatchError
+from benchmarking.timing import TimingConfig
 from benchmarking.plotter import plot_results
 
-def main():
+COMMANDS = ("run", "compare", "list")
+# Run options that may change when a run is resumed: they only affect display
+# and the process pool, not what a cell measures. They are not recorded.
+RESUMABLE_OPTIONS = ("show", "workers", "no_pin")
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Blockchain accumulator benchmark.")
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("--history", default=DEFAULT_HISTORY_DIR,
+                        help="Directory holding one sub-directory per benchmark run.")
+    subparsers = parser.add_subparsers(dest="command")
+
+    run_parser = subparsers.add_parser("run", parents=[common], help="Run the benchmark (default command).")
+    run_parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_STATE_SIZES,
+                            help="State sizes to benchmark (paper: 100 1000 5000 10000 50000).")
+    run_parser.add_argument("--schemes", nargs="+", default=None, choices=list(SCHEME_ALIASES),
+                            help="Schemes to benchmark (default: all).")
+    run_parser.add_argument("--runs", type=int, default=DEFAULT_NUM_RUNS,
+                            help="Independent runs per (scheme, size) cell.")
+    run_parser.add_argument("--updates", type=int, default=FIXED_UPDATES,
+                            help="Updates per batch-update sample (capped at the state size).")
+    run_parser.add_argument("--warmup", type=int, default=DEFAULT_TIMING.warmup,
+                            help="Untimed warmup calls before each operation is sampled.")
+    run_parser.add_argument("--min-repeat", type=int, default=DEFAULT_TIMING.min_repeat,
+                            help="Minimum timed samples per operation and run.")
+    run_parser.add_argument("--max-repeat", type=int, default=DEFAULT_TIMING.max_repeat,
+                            help="Maximum timed samples per operation and run.")
+    run_parser.add_argument("--max-time", type=float, default=DEFAULT_TIMING.max_time,
+                            help="Seconds after which sampling an operation stops (once --min-repeat is met).")
+    run_parser.add_argument("--workers", type=int, default=None,
+                            help="Worker processes (default: all available CPUs; 1 runs in-process).")
+    run_parser.add_argument("--no-pin", action="store_true",
+                            help="Do not pin worker processes to CPUs.")
+    run_parser.add_argument("--seed", type=int, default=DEFAULT_SEED,
+                            help="Base seed from which every cell's seed is derived.")
+    run_parser.add_argument("--zipf", type=float, default=DEFAULT_ZIPF_EXPONENT,
+                            help="Zipf exponent of the keys updated and proven (0: uniform, 0.99: hot keys).")
+    run_parser.add_argument("--run-id", default=None,
+                            help="Run id in the history (default: a new timestamped id). "
+                                 "Reuse an id with the same options to resume it; completed cells are skipped.")
+    run_parser.add_argument("--resume", nargs="?", const="latest", default=None, metavar="RUN",
+                            help="Resume a run ('latest' if no id is given, a run id or -N) made with the same "
+                                 "options; completed cells are skipped.")
+    run_parser.add_argument("--show", action="store_true",
+                            help="Open the plots interactively after saving them.")
+    run_parser.add_argument("--instrument", action="store_true",
+                            help="Count and time hash, prime, product and pow calls per operation.")
+    run_parser.add_argument("--profile", action="store_true",
+                            help="Write a cProfile .prof file per cell into the run directory.")
+    run_parser.add_argument("--trace-memory", action="store_true",
+                            help="Record each cell's peak memory with tracemalloc (slows the run).")
+
+    compare_parser = subparsers.add_parser(
+        "compare", parents=[common], help="Diff two runs and flag significant regressions.")
+    compare_parser.add_argument("base", nargs="?", default="previous",
+                                help="Baseline run id, 'latest', 'previous' or -N (default: previous).")
+    compare_parser.add_argument("new", nargs="?", default="latest",
+                                help="Candidate run id, 'latest', 'previous' or -N (default: latest).")
+    compare_parser.add_argument("--alpha", type=float, default=DEFAULT_ALPHA,
+                                help="Significance level of the Mann-Whitney U test.")
+    compare_parser.add_argument("--time-threshold", type=float, default=DEFAULT_TIME_THRESHOLD,
+                                help="Minimum relative slowdown to flag, e.g. 0.05 for 5%%.")
+    compare_parser.add_argument("--size-threshold", type=float, default=DEFAULT_SIZE_THRESHOLD,
+                                help="Minimum relative proof-size growth to flag.")
+    compare_parser.add_argument("--output", default=None,
+                                help="Report directory (default: <history>/compare-<base>-<new>).")
+
+    subparsers.add_parser("list", parents=[common], help="List the runs in the history.")
+
+    argv = list(sys.argv[1:] if argv is None else argv)
+    # Without a command, behave as before and run the benchmark.
+    if not argv or argv[0] not in COMMANDS + ("-h", "--help"):
+        argv.insert(0, "run")
+    return parser.parse_args(argv)
+
+def run(args: argparse.Namespace) -> int:
+    history = RunHistory(args.history)
+    if args.run_id and args.resume:
+        print("error: use either --run-id or --resume, not both", file=sys.stderr)
+        return 2
+    try:
+        run_id = history.resolve(args.resume) if args.resume else (args.run_id or history.new_run_id())
+    except ValueError as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 2
+    results_path = history.results_path(run_id)
+    run_dir = history.run_dir(run_id)
+
+    try:
+        history.write_meta(run_id, {
+            key: value for key, value in vars(args).items()
+            if key not in ("command", "history", "run_id", "resume") + RESUMABLE_OPTIONS
+        })
+        print(f"Starting blockchain accumulator benchmark (run {run_id})...")
+
+        # Run the benchmarks
+        results = run_benchmark(
+            state_sizes=args.sizes,
+            schemes=args.schemes,
+            num_runs=args.runs,
+            num_updates=args.updates,
+            workers=args.workers,
+            seed=args.seed,
+            results_path=results_path,
+            pin_cpus=not args.no_pin,
+            timing=TimingConfig(
+                warmup=args.warmup,
+                min_repeat=args.min_repeat,
+                max_repeat=args.max_repeat,
+                max_time=args.max_time,
+            ),
+            profiling=ProfilingConfig(
+                instrument=args.instrument,
+                profile_dir=os.path.join(run_dir, "profiles") if args.profile else None,
+                trace_memory=args.trace_memory,
+            ),
+            zipf_exponent=args.zipf,
+        )
+    except ConfigMismatchError as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 2
+
+    print()
+    print(format_summary(results))
+    if args.instrument:
+        print()
+        print(format_instrumentation(results))
+
+    print(f"\nBenchmark finished. Raw results in '{results_path}'. Generating plots...")
+
+    # Plot the results
+    plot_results(results, output_dir=run_dir, show=args.show)
+
+    print(f"\nPlots saved to '{run_dir}' directory.")
+    print("Experiment complete.")
+    return 0
+
+def compare(args: argparse.Namespace) -> int:
+    history = RunHistory(args.history)
+    try:
+        base_id, new_id = history.resolve(args.base), history.resolve(args.new)
+    except ValueError as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 2
+    base_records, new_records = history.load_records(base_id), history.load_records(new_id)
+    rows = compare_runs(
+        base_records,
+        new_records,
+        alpha=args.alpha,
+        time_threshold=args.time_threshold,
+        size_threshold=args.size_threshold,
+    )
+    warnings = config_warnings(
+        base_records, new_records,
+        history.load_meta(base_id).get("config"), history.load_meta(new_id).get("config"),
+    )
+    for warning in warnings:
+        print(f"WARNING: {warning}")
+    output_dir = args.output or os.path.join(args.history, f"compare-{base_id}-{new_id}")
+    report_path = write_report(rows, output_dir, base_id, new_id, warnings)
+
+    regressions = [r for r in rows if r["regression"]]
+    for r in regressions:
+        print(f"REGRESSION: {r['scheme']} N={r['state_size']} {r['metric']}: "
+              f"{r['base']:.3e} -> {r['new']:.3e} (x{r['ratio']:.2f})")
+    print(f"{len(rows)} cells compared, {len(regressions)} regressions. Report: '{report_path}'.")
+    # A non-zero exit code lets CI block a deploy on regressions.
+    return 1 if regressions else 0
+
+def list_runs(args: argparse.Namespace):
+    history = RunHistory(args.history)
+    for run_id in history.list_runs():
+        meta = history.load_meta(run_id)
+        commit = (meta.get("git_commit") or "")[:10]
+        print(f"{run_id}  {commit:<10}  {len(history.load_records(run_id))} cells")
+
+def main(argv=None) -> int:
     """
     Main entry point for the experiment.
     """
-    print("Starting blockchain accumulator benchmark...")
-    
-    # Run the benchmarks
-    results = run_benchmark()
-    
-    print("\nBenchmark finished. Generating plots...")
-    
-    # Plot the results
-    plot_results(results)
-    
-    print("\nPlots saved to 'experiment/' directory.")
-    print("Experiment complete.")
+    args = parse_args(argv)
+    if args.command == "compare":
+        return compare(args)
+    if args.command == "list":
+        list_runs(args)
+        return 0
+    return run(args)
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
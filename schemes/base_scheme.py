@@ -1,5 +1,5 @@
 from abc import ABC, abstractmethod
-from typing import Any
+from typing import Any, Iterable
 
 class AccumulatorScheme(ABC):
     """
@@ -24,6 +24,25 @@ class AccumulatorScheme(ABC):
         """
         pass
 
+    @classmethod
+    def create_from_iter(cls, elements: Iterable[bytes], keep_state: bool = True, **kwargs) -> "AccumulatorScheme":
+        """
+        Builds a scheme and creates its accumulator from an iterable of elements.
+        Schemes that can commit in a single streaming pass override this; this
+        default materializes the state and always keeps it.
+
+        :param elements: The initial state elements, consumed once.
+        :param keep_state: Keep the state (and lookup structures) in memory, so
+            the scheme can prove and update. If False, only the commitment is
+            kept; schemes that cannot do that raise NotImplementedError.
+        :param kwargs: Extra constructor arguments of the scheme.
+        """
+        if not keep_state:
+            raise NotImplementedError(f"{cls.__name__} cannot be created without keeping its state.")
+        scheme = cls(list(elements), **kwargs)
+        scheme.create()
+        return scheme
+
     @abstractmethod
     def prove_membership(self, element: bytes) -> Any:
         """
@@ -1,8 +1,9 @@
 from typing import Any, NamedTuple
 
 from .base_scheme import AccumulatorScheme
-from .merkle import MerkleTree
-from .rsa_accumulator import RsaAccumulator
+from . import merkle, rsa_accumulator
+from .merkle import MerkleTree, MerkleUpdateDelta
+from .rsa_accumulator import RsaAccumulator, RsaUpdateDelta
 from utils.crypto import get_hash, bytes_to_int, int_to_bytes
 
 class HybridProof(NamedTuple):
@@ -10,23 +11,61 @@ class HybridProof(NamedTuple):
     top_level_proof: list[bytes]
     segment_accumulator_val: int
 
+class HybridUpdateDelta(NamedTuple):
+    """
+    The change of a batch of updates: the changed top-level Merkle nodes and,
+    for every touched segment, its RSA delta and new accumulator.
+    """
+    top_level: MerkleUpdateDelta
+    segments: dict[int, RsaUpdateDelta]
+    num_segments: int
+
+def refresh_proof(element: bytes, proof: HybridProof, delta: HybridUpdateDelta) -> HybridProof | None:
+    """
+    Brings an old hybrid proof up to date using an update delta.
+    The segment witness is refreshed only if the element's segment changed;
+    the top-level path is always refreshed against the changed Merkle nodes.
+
+    :return: The refreshed proof, or None if the element was removed.
+    """
+    segment_idx = bytes_to_int(get_hash(element)) % delta.num_segments
+
+    segment_proof = proof.segment_proof
+    segment_accumulator_val = proof.segment_accumulator_val
+    segment_delta = delta.segments.get(segment_idx)
+    if segment_delta is not None:
+        segment_proof = rsa_accumulator.refresh_proof(element, segment_proof, segment_delta)
+        if segment_proof is None:
+            return None
+        segment_accumulator_val = segment_delta.accumulator
+
+    top_level_proof = merkle.refresh_proof(proof.top_level_proof, delta.top_level, segment_idx)
+
+    return HybridProof(
+        segment_proof=segment_proof,
+        top_level_proof=top_level_proof,
+        segment_accumulator_val=segment_accumulator_val
+    )
+
 class HybridScheme(AccumulatorScheme):
     """
     The proposed Hybrid Accumulator Scheme (Merkle-Accumulator Hybrid Tree).
     - A top-level Merkle tree commits to segment accumulators.
     - Each segment is an RSA accumulator.
+    - With track_deltas=True, updates are recorded for take_update_delta.
     """
 
-    def __init__(self, state: list[bytes], num_segments: int = 16):
+    def __init__(self, state: list[bytes], num_segments: int = 16, track_deltas: bool = False):
         super().__init__(state)
         self.num_segments = num_segments
+        self.track_deltas = track_deltas
         # Create segments and distribute initial state
         segment_states = [[] for _ in range(num_segments)]
         for element in self.state:
             segment_idx = self._get_segment_index(element)
             segment_states[segment_idx].append(element)
         
-        self.segments: list[RsaAccumulator] = [RsaAccumulator(s) for s in segment_states]
+        self.segments: list[RsaAccumulator] = [RsaAccumulator(s, track_deltas) for s in segment_states]
         self.top_level_tree: MerkleTree = None
 
     def _get_segment_index(self, element: bytes) -> int:
@@ -40,7 +79,7 @@ class HybridScheme(AccumulatorScheme):
             segment_digest = int_to_bytes(segment.accumulator)
             segment_accumulator_digests.append(segment_digest)
         
-        self.top_level_tree = MerkleTree(segment_accumulator_digests)
+        self.top_level_tree = MerkleTree(segment_accumulator_digests, track_deltas=self.track_deltas)
         self.top_level_tree.create()
         
         self.accumulator = self.top_level_tree.accumulator
@@ -97,10 +136,8 @@ class HybridScheme(AccumulatorScheme):
             new_segment = self.segments[new_segment_idx]
             new_segment_digest_before = int_to_bytes(new_segment.accumulator)
             
-            old_segment.state.remove(old_element)
-            old_segment.create()
-            new_segment.state.append(new_element)
-            new_segment.create()
+            old_segment.remove_element(old_element)
+            new_segment.add_element(new_element)
 
             old_segment_digest_after = int_to_bytes(old_segment.accumulator)
             new_segment_digest_after = int_to_bytes(new_segment.accumulator)
@@ -114,4 +151,23 @@ class HybridScheme(AccumulatorScheme):
         except ValueError:
             pass
 
-        self.accumulator = self.top_level_tree.accumulator 
\ No newline at end of file
+        self.accumulator = self.top_level_tree.accumulator 
+
+    def take_update_delta(self) -> HybridUpdateDelta:
+        """
+        Returns the change of all updates since the previous call and starts
+        a new batch. Only segments that changed are included.
+        Requires track_deltas=True.
+        """
+        if not self.track_deltas:
+            raise RuntimeError("Update deltas are only recorded with track_deltas=True.")
+        segment_deltas = {
+            idx: segment.take_update_delta()
+            for idx, segment in enumerate(self.segments)
+            if segment.has_pending_changes()
+        }
+        return HybridUpdateDelta(
+            top_level=self.top_level_tree.take_update_delta(),
+            segments=segment_deltas,
+            num_segments=self.num_segments
+        )
@@ -1,21 +1,55 @@
 import time
-from typing import Any, Dict
+from typing import Any, Dict, Iterable, NamedTuple
 
 from .base_scheme import AccumulatorScheme
 from utils.crypto import get_hash
 
+ZERO_LEAF = b'\x00' * 32 # Padding leaf up to the next power of two
+
+class MerkleUpdateDelta(NamedTuple):
+    """
+    The nodes changed by a batch of updates, keyed by (level, index).
+    Level 0 holds the leaf hashes; the last level holds the root.
+    """
+    nodes: dict[tuple[int, int], bytes]
+    root: bytes
+
+def refresh_proof(proof: list[bytes], delta: MerkleUpdateDelta, leaf_index: int) -> list[bytes]:
+    """
+    Brings an old membership proof up to date using an update delta.
+    Only the siblings along the leaf's path are looked up, so this is O(log N)
+    and needs no access to the tree. If the leaf itself was replaced in the batch,
+    the refreshed proof will (correctly) fail verification for the old element.
+
+    :param proof: The sibling hashes returned by prove_membership.
+    :param delta: The delta emitted by MerkleTree.take_update_delta.
+    :param leaf_index: The position of the proven leaf in the tree.
+    :return: The refreshed list of sibling hashes.
+    """
+    refreshed = []
+    idx = leaf_index
+    for level, sibling_hash in enumerate(proof):
+        sibling_idx = idx ^ 1
+        refreshed.append(delta.nodes.get((level, sibling_idx), sibling_hash))
+        idx //= 2
+    return refreshed
+
 class MerkleTree(AccumulatorScheme):
     """
     A simplified Merkle Tree implementation for benchmarking.
     - Pads to the nearest power of two.
     - Uses a hash map for O(1) leaf lookups.
+    - With track_deltas=True, updates record the changed nodes for take_update_delta.
     """
 
-    def __init__(self, state: list[bytes]):
+    def __init__(self, state: list[bytes], track_deltas: bool = False):
         super().__init__(state)
         self.leaves = [get_hash(s) for s in self.state]
         self.tree: list[list[bytes]] = []
         self.leaf_to_index: Dict[bytes, int] = {}
+        self.track_deltas = track_deltas
+        # Nodes changed since the last call to take_update_delta.
+        self._changed_nodes: Dict[tuple[int, int], bytes] = {}
 
     def create(self):
         num_leaves = len(self.leaves)
@@ -25,7 +59,7 @@ class MerkleTree(AccumulatorScheme):
             return
 
         next_pow_2 = 1 << (num_leaves - 1).bit_length() if num_leaves > 0 else 1
-        self.padded_leaves = self.leaves + [b'\x00' * 32] * (next_pow_2 - num_leaves)
+        self.padded_leaves = self.leaves + [ZERO_LEAF] * (next_pow_2 - num_leaves)
         
         # Build the leaf_to_index map
         for i, leaf_hash in enumerate(self.padded_leaves):
@@ -47,6 +81,49 @@ class MerkleTree(AccumulatorScheme):
         
         self.accumulator = self.tree[-1][0] if self.tree and self.tree[-1] else None
 
+    @classmethod
+    def create_from_iter(cls, elements: Iterable[bytes], keep_state: bool = True, **kwargs) -> "MerkleTree":
+        """
+        Computes the root in one pass over `elements` with O(log N) memory.
+        Leaf hashes are folded into a stack of (height, root) pairs of complete
+        subtrees; equal heights are merged as they appear. At the end the stack
+        is closed with all-zero subtrees, which yields the same root as create()
+        over the zero-padded leaves.
+        With keep_state=False the tree keeps only its root: it is meant for
+        comparing roots and cannot prove, verify or update (verification
+        needs the leaf positions).
+        """
+        if keep_state:
+            return super().create_from_iter(elements, **kwargs)
+
+        tree = cls([], **kwargs)
+        stack: list[tuple[int, bytes]] = []
+        for element in elements:
+            height, node = 0, get_hash(element)
+            while stack and stack[-1][0] == height:
+                node = get_hash(stack.pop()[1] + node)
+                height += 1
+            stack.append((height, node))
+
+        if not stack:
+            tree.create()
+            return tree
+
+        # zero_subtrees[h] is the root of a complete subtree of 2^h padding leaves.
+        zero_subtrees = [ZERO_LEAF]
+        while len(stack) > 1:
+            height, node = stack.pop()
+            while len(zero_subtrees) <= height:
+                zero_subtrees.append(get_hash(zero_subtrees[-1] + zero_subtrees[-1]))
+            node, height = get_hash(node + zero_subtrees[height]), height + 1
+            while stack and stack[-1][0] == height:
+                node = get_hash(stack.pop()[1] + node)
+                height += 1
+            stack.append((height, node))
+
+        tree.accumulator = stack[0][1]
+        return tree
+
     def prove_membership(self, element: bytes) -> list[bytes] | None:
         leaf_hash = get_hash(element)
         idx = self.leaf_to_index.get(leaf_hash)
@@ -112,6 +189,8 @@ class MerkleTree(AccumulatorScheme):
 
         # Update the leaf in the tree's base level and the lookup map
         self.tree[0][idx] = new_leaf_hash
+        if self.track_deltas:
+            self._changed_nodes[(0, idx)] = new_leaf_hash
         del self.leaf_to_index[old_leaf_hash]
         self.leaf_to_index[new_leaf_hash] = idx
         
@@ -136,6 +215,21 @@ class MerkleTree(AccumulatorScheme):
                 break
 
             self.tree[i+1][parent_idx] = new_parent_hash
+            if self.track_deltas:
+                self._changed_nodes[(i+1, parent_idx)] = new_parent_hash
             current_idx = parent_idx
         
-        self.accumulator = self.tree[-1][0]
\ No newline at end of file
+        self.accumulator = self.tree[-1][0]
+
+    def take_update_delta(self) -> MerkleUpdateDelta:
+        """
+        Returns the nodes changed by all updates since the previous call and
+        starts a new batch. Repeated changes to a node are merged, so the delta
+        holds at most one entry per node.
+        Requires track_deltas=True.
+        """
+        if not self.track_deltas:
+            raise RuntimeError("Update deltas are only recorded with track_deltas=True.")
+        delta = MerkleUpdateDelta(nodes=self._changed_nodes, root=self.accumulator)
+        self._changed_nodes = {}
+        return delta
@@ -1,8 +1,8 @@
-from typing import Any
+from typing import Any, Iterable, NamedTuple
 from Crypto.Util import number
 
 from .base_scheme import AccumulatorScheme
-from utils.crypto import prime_representatives, product, get_hash
+from utils.crypto import prime_representatives, product, get_hash, mod_pow
 
 # --- Simulated Trusted Setup ---
 # In a real system, N would be generated by a trusted party, and its
@@ -20,6 +20,50 @@ PHI_N = (p - 1) * (q - 1)
 # --- End Simulated Trusted Setup ---
 
 PRIME_BITS = 128 # The size of primes representing elements
+STREAM_CHUNK_SIZE = 4096 # Primes folded into the accumulator at a time by create_from_iter
+
+class RsaUpdateDelta(NamedTuple):
+    """
+    The net change of a batch of updates: the products of the primes added
+    to and removed from the accumulator, and the resulting accumulator value.
+    """
+    added_product: int
+    removed_product: int
+    accumulator: int
+
+def refresh_proof(element: bytes, proof: int, delta: RsaUpdateDelta) -> int | None:
+    """
+    Brings an old membership witness up to date using an update delta,
+    without the trapdoor and without the rest of the state.
+    - Additions: w' = w^a, where a is the product of added primes.
+    - Deletions: with Bezout coefficients s*x + t*d = 1, w' = w^t * A'^s,
+      where x is the element's prime, d the product of removed primes and
+      A' the new accumulator.
+
+    :return: The refreshed witness, or None if the element was removed.
+    """
+    x = prime_representatives([get_hash(element)], PRIME_BITS)[0]
+    if delta.removed_product % x == 0:
+        return None
+
+    witness = mod_pow(proof, delta.added_product, N)
+    if delta.removed_product == 1:
+        return witness
+
+    s, t = _bezout(x, delta.removed_product)
+    return (mod_pow(witness, t, N) * mod_pow(delta.accumulator, s, N)) % N
+
+def _bezout(a: int, b: int) -> tuple[int, int]:
+    """Returns (s, t) with s*a + t*b == gcd(a, b)."""
+    old_r, r = a, b
+    old_s, s = 1, 0
+    old_t, t = 0, 1
+    while r:
+        quotient = old_r // r
+        old_r, r = r, old_r - quotient * r
+        old_s, s = s, old_s - quotient * s
+        old_t, t = t, old_t - quotient * t
+    return old_s, old_t
 
 class RsaAccumulator(AccumulatorScheme):
     """
@@ -29,12 +73,54 @@ class RsaAccumulator(AccumulatorScheme):
     - NOTE: `prove_membership` is implemented inefficiently (O(N)) for simplicity.
       A full implementation would update witnesses alongside the accumulator.
     - NOTE: `update` is O(N) as it recomputes the accumulator without the trapdoor.
+    - With track_deltas=True, updates record the net prime changes for take_update_delta.
     """
 
-    def __init__(self, state: list[bytes]):
+    def __init__(self, state: list[bytes], track_deltas: bool = False):
         super().__init__(state)
         self.prime_map: dict[bytes, int] = {} 
         self.accumulator = G
+        self.track_deltas = track_deltas
+        # Net prime changes since the last call to take_update_delta.
+        self._added_primes: set[int] = set()
+        self._removed_primes: set[int] = set()
+
+    def _record_addition(self, prime: int):
+        if not self.track_deltas:
+            return
+        if prime in self._removed_primes:
+            self._removed_primes.discard(prime)
+        else:
+            self._added_primes.add(prime)
+
+    def _record_removal(self, prime: int):
+        if not self.track_deltas:
+            return
+        if prime in self._added_primes:
+            self._added_primes.discard(prime)
+        else:
+            self._removed_primes.add(prime)
+
+    def has_pending_changes(self) -> bool:
+        """True if elements were added or removed since the last delta."""
+        return bool(self._added_primes or self._removed_primes)
+
+    def take_update_delta(self) -> RsaUpdateDelta:
+        """
+        Returns the net change of all updates since the previous call and
+        starts a new batch. Clients pass it to refresh_proof.
+        Requires track_deltas=True.
+        """
+        if not self.track_deltas:
+            raise RuntimeError("Update deltas are only recorded with track_deltas=True.")
+        delta = RsaUpdateDelta(
+            added_product=product(list(self._added_primes)),
+            removed_product=product(list(self._removed_primes)),
+            accumulator=self.accumulator
+        )
+        self._added_primes = set()
+        self._removed_primes = set()
+        return delta
 
     def _map_to_primes(self, elements: list[bytes]):
         """Maps elements to primes and stores them."""
@@ -55,7 +141,44 @@ class RsaAccumulator(AccumulatorScheme):
             return
 
         prime_prod = product([self.prime_map[get_hash(s)] for s in self.state])
-        self.accumulator = pow(G, prime_prod, N)
+        self.accumulator = mod_pow(G, prime_prod, N)
+
+    @classmethod
+    def create_from_iter(cls, elements: Iterable[bytes], keep_state: bool = True, **kwargs) -> "RsaAccumulator":
+        """
+        Creates the accumulator in one pass over `elements`, without ever
+        holding the product of all primes. Primes are combined in a product
+        tree per chunk of STREAM_CHUNK_SIZE, and each chunk product is folded
+        into the running value: G^(P1*P2*...) = (G^P1)^P2... . The number of
+        modular squarings equals that of create(), but the exponent stays at
+        about STREAM_CHUNK_SIZE * PRIME_BITS bits.
+        With keep_state=False neither the state nor the prime map is kept, so
+        the accumulator can verify witnesses but cannot prove or update.
+        """
+        accumulator = cls([], **kwargs)
+        value = G
+        chunk: list[bytes] = []
+
+        def fold(value: int, chunk: list[bytes]) -> int:
+            hashes = [get_hash(e) for e in chunk]
+            if keep_state:
+                accumulator.state.extend(chunk)
+                accumulator._map_to_primes(chunk)
+                primes = [accumulator.prime_map[h] for h in hashes]
+            else:
+                primes = prime_representatives(hashes, PRIME_BITS)
+            return mod_pow(value, product(primes), N)
+
+        for element in elements:
+            chunk.append(element)
+            if len(chunk) == STREAM_CHUNK_SIZE:
+                value = fold(value, chunk)
+                chunk = []
+        if chunk:
+            value = fold(value, chunk)
+
+        accumulator.accumulator = value
+        return accumulator
 
     def prove_membership(self, element: bytes) -> int | None:
         element_hash = get_hash(element)
@@ -63,7 +186,7 @@ class RsaAccumulator(AccumulatorScheme):
             return None 
 
         other_primes_prod = product([self.prime_map[get_hash(s)] for s in self.state if get_hash(s) != element_hash])
-        witness = pow(G, other_primes_prod, N)
+        witness = mod_pow(G, other_primes_prod, N)
 
         return witness
 
@@ -75,7 +198,32 @@ class RsaAccumulator(AccumulatorScheme):
         x = self.prime_map[element_hash]
         witness = proof
         
-        return pow(witness, x, N) == self.accumulator
+        return mod_pow(witness, x, N) == self.accumulator
+
+    def add_element(self, element: bytes):
+        """
+        Adds an element to the state and recomputes the accumulator
+        (O(N) without the trapdoor).
+        """
+        self.state.append(element)
+        self._map_to_primes([element])
+        self._record_addition(self.prime_map[get_hash(element)])
+        self._recompute()
+
+    def remove_element(self, element: bytes):
+        """
+        Removes an element from the state and recomputes the accumulator
+        (O(N) without the trapdoor). Raises ValueError if it is not in the state.
+        """
+        self.state.remove(element)
+        prime = self.prime_map.pop(get_hash(element), None)
+        if prime is not None:
+            self._record_removal(prime)
+        self._recompute()
+
+    def _recompute(self):
+        prime_prod = product([self.prime_map[get_hash(s)] for s in self.state])
+        self.accumulator = mod_pow(G, prime_prod, N)
 
     def update(self, old_element: bytes, new_element: bytes):
         """
@@ -92,18 +240,18 @@ class RsaAccumulator(AccumulatorScheme):
 
         old_hash = get_hash(old_element)
         if old_hash in self.prime_map:
+            self._record_removal(self.prime_map[old_hash])
             del self.prime_map[old_hash]
-        
-        prime_prod = product([self.prime_map[get_hash(s)] for s in self.state])
-        self.accumulator = pow(G, prime_prod, N)
+        self._record_addition(self.prime_map[get_hash(new_element)])
+        self._recompute()
 
 class RsaAccumulatorTrapdoored(RsaAccumulator):
     """
     An RSA Accumulator that uses the trapdoor (phi_n) for efficient
     batch updates. This represents a scenario with a trusted prover.
     """
-    def __init__(self, state: list[bytes]):
-        super().__init__(state)
+    def __init__(self, state: list[bytes], track_deltas: bool = False):
+        super().__init__(state, track_deltas)
         self.phi_n = PHI_N
 
     def update(self, old_element: bytes, new_element: bytes):
@@ -121,19 +269,26 @@ class RsaAccumulatorTrapdoored(RsaAccumulator):
         add_prod = 1
         if additions:
             self._map_to_primes(additions)
-            add_prod = product([self.prime_map[get_hash(s)] for s in additions])
+            add_primes = [self.prime_map[get_hash(s)] for s in additions]
+            add_prod = product(add_primes)
 
         inv_del_prod = 1
         if deletions:
             deleted_hashes = {get_hash(d) for d in deletions}
             primes_to_remove = [self.prime_map[h] for h in deleted_hashes if h in self.prime_map]
             
+            for prime in primes_to_remove:
+                self._record_removal(prime)
             if primes_to_remove:
                 del_prod = product(primes_to_remove)
                 inv_del_prod = pow(del_prod, -1, self.phi_n)
         
+        if additions:
+            for prime in add_primes:
+                self._record_addition(prime)
+
         update_exponent = (add_prod * inv_del_prod) % self.phi_n
-        self.accumulator = pow(self.accumulator, update_exponent, N)
+        self.accumulator = mod_pow(self.accumulator, update_exponent, N)
 
         current_state_set = set(self.state)
         current_state_set.difference_update(deletions)
@@ -1,44 +1,269 @@
+from typing import Any, NamedTuple
+
 from .base_scheme import AccumulatorScheme
-from typing import Any
+from utils import curve
+from utils.crypto import get_hash, bytes_to_int
+from utils.ipa import MultiProof, Opening, get_settings, hash_to_scalar, multiproof_prove, multiproof_verify
+
+# Ethereum's Verkle design uses width 256; in pure Python a narrower tree keeps
+# the IPA (2 * log2(width) rounds, O(width) verifier work) affordable.
+DEFAULT_WIDTH = 16
+SUPPORTED_WIDTHS = (2, 4, 16, 256) # Widths whose digit size divides a byte
+KEY_BITS = 256
+
+class VerkleProof(NamedTuple):
+    depths: list[int]         # Internal nodes on each element's path, root included
+    commitments: list[bytes]  # Compressed commitments of the non-root nodes on the paths
+    multiproof: MultiProof
+
+class _Leaf:
+    __slots__ = ("key", "element")
+
+    def __init__(self, key: int, element: bytes):
+        self.key = key
+        self.element = element
+
+class _Node:
+    __slots__ = ("children", "values", "commitment", "_field_value")
+
+    def __init__(self, width: int):
+        self.children: list[Any] = [None] * width
+        self.values: list[int] = [0] * width
+        self.commitment = curve.INFINITY
+        self._field_value: int | None = None
+
+    def field_value(self) -> int:
+        """The node's commitment mapped to a scalar, as stored in its parent (cached)."""
+        if self._field_value is None:
+            self._field_value = hash_to_scalar(b"verkle-node" + curve.compress(self.commitment))
+        return self._field_value
+
+def _leaf_value(element: bytes) -> int:
+    return hash_to_scalar(b"verkle-leaf" + element)
 
 class VerkleTree(AccumulatorScheme):
     """
-    A placeholder for a Verkle Tree implementation.
-    A full implementation requires polynomial commitments (e.g., KZG) over
-    elliptic curve pairings, which is a heavy dependency. For the purpose
-    of this benchmark structure, we are creating a mock class.
-    
-    The performance characteristics (from the paper) would be:
-    - Witness Size: Nearly constant, very small.
-    - Prover Time: Slower than Merkle due to polynomial math.
-    - Verifier Time: Fast, a few pairing checks.
+    A Verkle tree over Pedersen vector commitments with IPA openings
+    (secp256k1, no trusted setup).
+    - Each internal node commits to a vector of `width` scalars: a child
+      node's hashed commitment, a leaf's hashed element, or 0 if empty.
+    - Elements are placed by the digits of their hash. A leaf sits in the
+      shallowest slot that is unique to it, so depth ~ log_width(N).
+    - Node commitments are cached; an update changes one entry per node on
+      the path, which is one fixed-base scalar multiplication per level.
+    - All openings along one or many paths are proven with a single multiproof.
     """
 
-    def __init__(self, state: list[bytes]):
+    def __init__(self, state: list[bytes], width: int = DEFAULT_WIDTH):
         super().__init__(state)
-        if not hasattr(self.__class__, '_printed_note'):
-            print("\nNOTE: VerkleTree is a mocked placeholder and does not represent real performance.")
-            self.__class__._printed_note = True
+        if width not in SUPPORTED_WIDTHS:
+            raise ValueError(f"Verkle width must be one of {SUPPORTED_WIDTHS}.")
+        self.width = width
+        self.bits = width.bit_length() - 1
+        self.max_depth = KEY_BITS // self.bits
+        self.settings = get_settings(width)
+        self.root = _Node(width)
+
+    def _key(self, element: bytes) -> int:
+        return bytes_to_int(get_hash(element))
+
+    def _digit(self, key: int, depth: int) -> int:
+        return (key >> (KEY_BITS - self.bits * (depth + 1))) & (self.width - 1)
+
+    def _value_of(self, child: Any) -> int:
+        if child is None:
+            return 0
+        if isinstance(child, _Leaf):
+            return _leaf_value(child.element)
+        return child.field_value()
+
+    def _set_commitment(self, node: _Node, commitment: tuple[int, int, int]):
+        node.commitment = commitment
+        node._field_value = None
 
     def create(self):
-        # In a real implementation, this would build the tree and compute commitments.
-        self.accumulator = b'verkle_root_placeholder'
+        self.root = _Node(self.width)
+        for element in self.state:
+            self._insert(element, refresh=False)
+        self._commit_subtree(self.root)
+        self.accumulator = curve.compress(self.root.commitment)
 
-    def prove_membership(self, element: bytes) -> Any:
-        # From literature, a proof is very small and constant regardless of state size.
-        # We return a fixed-size placeholder.
-        return b'\x00' * 200
+    def _commit_subtree(self, node: _Node):
+        for i, child in enumerate(node.children):
+            if isinstance(child, _Node):
+                self._commit_subtree(child)
+            node.values[i] = self._value_of(child)
+        self._set_commitment(node, self.settings.commit(node.values))
 
-    def verify_membership(self, element: bytes, proof: Any) -> bool:
-        # Mocked verification. In reality, this would involve pairing checks.
+    def _insert(self, element: bytes, refresh: bool = True):
+        key = self._key(element)
+        node, depth = self.root, 0
+        path: list[tuple[_Node, int]] = []
+        while True:
+            idx = self._digit(key, depth)
+            path.append((node, idx))
+            child = node.children[idx]
+            if child is None:
+                node.children[idx] = _Leaf(key, element)
+                break
+            if isinstance(child, _Node):
+                node, depth = child, depth + 1
+                continue
+            if child.key == key:
+                return # Already present
+            # Push the existing leaf one level down and retry there.
+            split = _Node(self.width)
+            slot = self._digit(child.key, depth + 1)
+            split.children[slot] = child
+            if refresh:
+                split.values[slot] = _leaf_value(child.element)
+                self._set_commitment(split, self.settings.update_commitment(curve.INFINITY, slot, split.values[slot]))
+            node.children[idx] = split
+            node, depth = split, depth + 1
+        if refresh:
+            self._refresh_path(path)
+
+    def _remove(self, element: bytes) -> bool:
+        key = self._key(element)
+        node, depth = self.root, 0
+        path: list[tuple[_Node, int]] = []
+        while True:
+            idx = self._digit(key, depth)
+            path.append((node, idx))
+            child = node.children[idx]
+            if child is None:
+                return False
+            if isinstance(child, _Node):
+                node, depth = child, depth + 1
+                continue
+            if child.key != key:
+                return False
+            node.children[idx] = None
+            break
+
+        # Keep the tree canonical: a non-root node left with a single leaf is
+        # replaced by that leaf, so the root only depends on the element set.
+        while len(path) > 1:
+            node = path[-1][0]
+            remaining = [c for c in node.children if c is not None]
+            if len(remaining) != 1 or isinstance(remaining[0], _Node):
+                break
+            path.pop()
+            parent, parent_idx = path[-1]
+            parent.children[parent_idx] = remaining[0]
+        self._refresh_path(path)
         return True
 
+    def _refresh_path(self, path: list[tuple[_Node, int]]):
+        """Re-commits the nodes on `path` bottom-up, one changed entry per node."""
+        for node, idx in reversed(path):
+            new_value = self._value_of(node.children[idx])
+            delta = new_value - node.values[idx]
+            if delta:
+                node.values[idx] = new_value
+                self._set_commitment(node, self.settings.update_commitment(node.commitment, idx, delta))
+        self.accumulator = curve.compress(self.root.commitment)
+
+    def _layout(self, keys: list[int], elements: list[bytes], depths: list[int]):
+        """
+        The openings a proof for `elements` consists of, in a canonical order
+        shared by prover and verifier. Returns (openings, node_prefixes):
+        openings are (prefix, slot, target) with target ('node', prefix) or
+        ('leaf', element); node_prefixes are the non-root nodes whose
+        commitments the proof carries. Returns None on inconsistent claims.
+        """
+        targets: dict[tuple[tuple[int, ...], int], tuple[str, Any]] = {}
+        for key, element, depth in zip(keys, elements, depths):
+            digits = tuple(self._digit(key, d) for d in range(depth))
+            for d in range(depth):
+                target = ("node", digits[:d + 1]) if d < depth - 1 else ("leaf", element)
+                existing = targets.setdefault((digits[:d], digits[d]), target)
+                if existing != target:
+                    return None
+        order = lambda item: (len(item[0][0]), item[0][0], item[0][1])
+        openings = [(prefix, slot, target) for (prefix, slot), target in sorted(targets.items(), key=order)]
+        node_prefixes = sorted({t[1] for _, _, t in openings if t[0] == "node"}, key=lambda p: (len(p), p))
+        return openings, node_prefixes
+
+    def prove_multi(self, elements: list[bytes]) -> VerkleProof | None:
+        """
+        Generates one proof for the membership of all `elements`.
+
+        :return: A VerkleProof, or None if any element is not in the tree.
+        """
+        keys = [self._key(e) for e in elements]
+        nodes: dict[tuple[int, ...], _Node] = {(): self.root}
+        depths = []
+        for key, element in zip(keys, elements):
+            node, prefix = self.root, ()
+            while True:
+                idx = self._digit(key, len(prefix))
+                child = node.children[idx]
+                if isinstance(child, _Node):
+                    prefix += (idx,)
+                    nodes[prefix] = node = child
+                    continue
+                if child is None or child.element != element:
+                    return None
+                depths.append(len(prefix) + 1)
+                break
+
+        openings, node_prefixes = self._layout(keys, elements, depths)
+        multiproof = multiproof_prove(
+            self.settings,
+            [Opening(nodes[prefix].commitment, slot, nodes[prefix].values[slot]) for prefix, slot, _ in openings],
+            [nodes[prefix].values for prefix, _, _ in openings]
+        )
+        return VerkleProof(
+            depths=depths,
+            commitments=[curve.compress(nodes[p].commitment) for p in node_prefixes],
+            multiproof=multiproof
+        )
+
+    def verify_multi(self, elements: list[bytes], proof: VerkleProof) -> bool:
+        """Verifies a proof produced by prove_multi against the current root."""
+        if len(proof.depths) != len(elements) or not elements:
+            return False
+        if any(not 1 <= d <= self.max_depth for d in proof.depths):
+            return False
+        layout = self._layout([self._key(e) for e in elements], elements, proof.depths)
+        if layout is None:
+            return False
+        openings, node_prefixes = layout
+        if len(node_prefixes) != len(proof.commitments):
+            return False
+        try:
+            commitments = {(): curve.decompress(self.accumulator)}
+            for prefix, data in zip(node_prefixes, proof.commitments):
+                commitments[prefix] = curve.decompress(data)
+        except ValueError:
+            return False
+
+        claimed = []
+        for prefix, slot, (kind, target) in openings:
+            if kind == "node":
+                value = hash_to_scalar(b"verkle-node" + curve.compress(commitments[target]))
+            else:
+                value = _leaf_value(target)
+            claimed.append(Opening(commitments[prefix], slot, value))
+        return multiproof_verify(self.settings, claimed, proof.multiproof)
+
+    def prove_membership(self, element: bytes) -> VerkleProof | None:
+        return self.prove_multi([element])
+
+    def verify_membership(self, element: bytes, proof: VerkleProof) -> bool:
+        return self.verify_multi([element], proof)
+
     def update(self, old_element: bytes, new_element: bytes):
-        # Mocked update. A real update involves changing a leaf and recomputing
-        # commitments along the path to the root.
-        # We just need to ensure the state is consistent for the benchmark runner.
+        """
+        Replaces old_element with new_element. Only the commitments on the two
+        affected paths change, each by a single-entry delta.
+        """
         try:
             idx = self.state.index(old_element)
-            self.state[idx] = new_element
         except ValueError:
-            pass # Element not found 
\ No newline at end of file
+            return # Element not found
+        if not self._remove(old_element):
+            return
+        self.state[idx] = new_element
+        self._insert(new_element)
@@ -1,10 +1,38 @@
+import hashlib
 import os
+import struct
+from typing import Iterator
 
-def generate_random_state(size: int) -> list[bytes]:
+_SEED_MASK = (1 << 64) - 1
+
+def derive_element(seed: int, index: int, version: int = 0) -> bytes:
+    """
+    Derives the 32-byte value of state element `index` at `version`.
+    Elements are a pure function of (seed, index, version), so any element of
+    an arbitrarily large state can be recomputed without storing the state.
+    """
+    return hashlib.sha256(struct.pack("<QQI", seed & _SEED_MASK, index, version)).digest()
+
+def iter_state(size: int, seed: int | None = None) -> Iterator[bytes]:
+    """
+    Lazily yields the elements of a simulated blockchain state, one at a time.
+
+    :param size: The number of elements in the state.
+    :param seed: If given, element i is derive_element(seed, i); otherwise random.
+    """
+    if seed is None:
+        for _ in range(size):
+            yield os.urandom(32)
+    else:
+        for index in range(size):
+            yield derive_element(seed, index)
+
+def generate_random_state(size: int, seed: int | None = None) -> list[bytes]:
     """
     Generates a list of unique random byte strings to simulate a blockchain state.
-    
+
     :param size: The number of elements in the state.
+    :param seed: If given, the state is reproducible (see iter_state).
     :return: A list of byte strings.
     """
-    return [os.urandom(32) for _ in range(size)] 
\ No newline at end of file
+    return list(iter_state(size, seed))
@@ -0,0 +1,283 @@
+import math
+import random
+import struct
+from dataclasses import dataclass
+from enum import IntEnum
+from typing import BinaryIO, Iterator, NamedTuple
+
+from .simulator import derive_element, iter_state
+
+class UpdateKind(IntEnum):
+    INSERT = 0
+    DELETE = 1
+    REPLACE = 2
+
+class Update(NamedTuple):
+    """
+    One state change. Keys are identified by a stable index; `version` is the
+    key's version after the change (for DELETE, the version that was removed).
+    `old` is None for inserts and `new` is None for deletes.
+    """
+    kind: UpdateKind
+    index: int
+    version: int
+    old: bytes | None
+    new: bytes | None
+
+Block = list[Update]
+
+@dataclass(frozen=True)
+class WorkloadConfig:
+    """
+    Describes a synthetic workload.
+    - initial_size: number of keys in the initial state.
+    - block_size: number of updates per block. No key is touched twice in a block.
+    - insert_ratio / delete_ratio: share of inserts and deletes; the rest are replacements.
+    - zipf_exponent: skew of key popularity; 0 is uniform, ~0.99 is a typical hot-key skew.
+    - seed: makes the state and the update sequence reproducible.
+    """
+    initial_size: int
+    block_size: int = 100
+    insert_ratio: float = 0.0
+    delete_ratio: float = 0.0
+    zipf_exponent: float = 0.0
+    seed: int = 0
+
+class ZipfSampler:
+    """
+    Samples ranks in [1, n] with P(k) proportional to 1 / k^exponent, in O(1)
+    time and memory per sample (rejection-inversion, Hörmann & Derflinger 1996).
+    No probability table is built, so n can be in the billions.
+    """
+
+    def __init__(self, n: int, exponent: float, rng: random.Random):
+        if n < 1:
+            raise ValueError("ZipfSampler needs at least one element.")
+        if exponent < 0:
+            raise ValueError("Zipf exponent must be non-negative.")
+        self.n = n
+        self.exponent = exponent
+        self.rng = rng
+        self._h_integral_x1 = self._h_integral(1.5) - 1.0
+        self._h_integral_n = self._h_integral(n + 0.5)
+        self._s = 2.0 - self._h_integral_inverse(self._h_integral(2.5) - self._h(2.0))
+
+    def _h(self, x: float) -> float:
+        return math.exp(-self.exponent * math.log(x))
+
+    def _h_integral(self, x: float) -> float:
+        log_x = math.log(x)
+        return _expm1_over_x((1.0 - self.exponent) * log_x) * log_x
+
+    def _h_integral_inverse(self, x: float) -> float:
+        t = x * (1.0 - self.exponent)
+        if t < -1.0:
+            # Limited precision can push t slightly below -1.
+            t = -1.0
+        return math.exp(_log1p_over_x(t) * x)
+
+    def sample(self) -> int:
+        if self.exponent == 0:
+            return self.rng.randrange(self.n) + 1
+        while True:
+            u = self._h_integral_n + self.rng.random() * (self._h_integral_x1 - self._h_integral_n)
+            x = self._h_integral_inverse(u)
+            k = min(max(int(x + 0.5), 1), self.n)
+            if k - x <= self._s or u >= self._h_integral(k + 0.5) - self._h(k):
+                return k
+
+def _log1p_over_x(x: float) -> float:
+    if abs(x) > 1e-8:
+        return math.log1p(x) / x
+    return 1.0 - x * (0.5 - x * (1.0 / 3.0 - 0.25 * x))
+
+def _expm1_over_x(x: float) -> float:
+    if abs(x) > 1e-8:
+        return math.expm1(x) / x
+    return 1.0 + x * 0.5 * (1.0 + x * (1.0 / 3.0) * (1.0 + 0.25 * x))
+
+class Workload:
+    """
+    A streaming, seeded generator of block-structured updates.
+
+    Only the keys touched so far are tracked (their versions and deletions),
+    so memory grows with the number of updates, not with the state size.
+    Key popularity follows a Zipf distribution over a fixed pseudo-random
+    permutation of the initial keys, so hot keys are scattered across the
+    key space (and across HybridScheme segments). Inserted keys rank after
+    the initial keys, newest last.
+    """
+
+    def __init__(self, config: WorkloadConfig):
+        if config.insert_ratio < 0 or config.delete_ratio < 0 or config.insert_ratio + config.delete_ratio > 1:
+            raise ValueError("insert_ratio and delete_ratio must be non-negative and sum to at most 1.")
+        self.config = config
+        self.rng = random.Random(config.seed)
+        self.next_index = config.initial_size
+        self.versions: dict[int, int] = {}
+        self.deleted: set[int] = set()
+        self._multiplier, self._offset = self._permutation(config.initial_size)
+        self._sampler: ZipfSampler | None = None
+
+    def _permutation(self, n: int) -> tuple[int, int]:
+        """Picks an affine permutation i -> (a*i + b) mod n of the initial keys."""
+        if n <= 1:
+            return 1, 0
+        a = self.rng.randrange(1, n) | 1
+        while math.gcd(a, n) != 1:
+            a += 1
+        return a, self.rng.randrange(n)
+
+    def initial_state(self) -> Iterator[bytes]:
+        """Lazily yields the initial state; never materialized by the workload."""
+        return iter_state(self.config.initial_size, self.config.seed)
+
+    def element(self, index: int) -> bytes:
+        """Returns the current value of key `index`."""
+        return derive_element(self.config.seed, index, self.versions.get(index, 0))
+
+    @property
+    def live_count(self) -> int:
+        return self.next_index - len(self.deleted)
+
+    def _rank_to_index(self, rank: int) -> int:
+        initial_size = self.config.initial_size
+        if rank <= initial_size:
+            return (self._multiplier * (rank - 1) + self._offset) % initial_size
+        return rank - 1
+
+    def sample_index(self, exclude: set[int] = frozenset()) -> int:
+        """
+        Draws a live key by popularity. Keys in `exclude` or deleted are redrawn;
+        after many misses (tiny or heavily touched key spaces) falls back to a
+        uniform draw.
+        """
+        if self._sampler is None or self._sampler.n != self.next_index:
+            self._sampler = ZipfSampler(self.next_index, self.config.zipf_exponent, self.rng)
+        for attempt in range(256):
+            if attempt < 64:
+                index = self._rank_to_index(self._sampler.sample())
+            else:
+                index = self.rng.randrange(self.next_index)
+            if index not in self.deleted and index not in exclude:
+                return index
+        for index in range(self.next_index):
+            if index not in self.deleted and index not in exclude:
+                return index
+        raise ValueError("No live keys left to sample.")
+
+    def sample_live_element(self) -> bytes:
+        """Draws the current value of a live key by popularity, e.g. to prove it."""
+        return self.element(self.sample_index())
+
+    def next_block(self, size: int | None = None) -> Block:
+        """Generates and applies the next block of updates."""
+        size = self.config.block_size if size is None else size
+        block: Block = []
+        touched: set[int] = set()
+        touched_live = 0  # Live keys touched in this block (inserted or replaced)
+        for _ in range(size):
+            r = self.rng.random()
+            # With no untouched live key left, only an insert is possible.
+            if r < self.config.insert_ratio or self.live_count - touched_live <= 0:
+                index = self.next_index
+                self.next_index += 1
+                touched_live += 1
+                block.append(Update(UpdateKind.INSERT, index, 0, None, derive_element(self.config.seed, index, 0)))
+            elif r < self.config.insert_ratio + self.config.delete_ratio:
+                index = self.sample_index(touched)
+                version = self.versions.get(index, 0)
+                self.deleted.add(index)
+                block.append(Update(UpdateKind.DELETE, index, version, self.element(index), None))
+            else:
+                index = self.sample_index(touched)
+                old = self.element(index)
+                version = self.versions.get(index, 0) + 1
+                self.versions[index] = version
+                block.append(Update(UpdateKind.REPLACE, index, version, old, self.element(index)))
+                touched_live += 1
+            touched.add(index)
+        return block
+
+    def blocks(self, count: int) -> Iterator[Block]:
+        for _ in range(count):
+            yield self.next_block()
+
+# --- Binary traces ---
+# Header: magic, format version, seed, initial size.
+# Each block: update count, then per update (kind, index, version).
+# Element values are not stored; they are re-derived from the seed on replay,
+# which keeps a trace at 13 bytes per update.
+TRACE_MAGIC = b"ACWT"
+TRACE_VERSION = 1
+_HEADER = struct.Struct("<4sBQQ")
+_BLOCK = struct.Struct("<I")
+_UPDATE = struct.Struct("<BQI")
+
+class TraceHeader(NamedTuple):
+    seed: int
+    initial_size: int
+
+    def initial_state(self) -> Iterator[bytes]:
+        return iter_state(self.initial_size, self.seed)
+
+class TraceWriter:
+    """Records blocks of updates to a compact binary trace file."""
+
+    def __init__(self, path: str, seed: int, initial_size: int):
+        self._file: BinaryIO = open(path, "wb")
+        self._file.write(_HEADER.pack(TRACE_MAGIC, TRACE_VERSION, seed & ((1 << 64) - 1), initial_size))
+
+    def write_block(self, block: Block):
+        self._file.write(_BLOCK.pack(len(block)))
+        self._file.write(b"".join(_UPDATE.pack(u.kind, u.index, u.version) for u in block))
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self) -> "TraceWriter":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def record_trace(workload: Workload, path: str, num_blocks: int) -> Iterator[Block]:
+    """Generates `num_blocks` blocks from `workload`, writing each to `path` as it is yielded."""
+    with TraceWriter(path, workload.config.seed, workload.config.initial_size) as writer:
+        for block in workload.blocks(num_blocks):
+            writer.write_block(block)
+            yield block
+
+def read_trace(path: str) -> tuple[TraceHeader, Iterator[Block]]:
+    """
+    Opens a trace for replay. Blocks are streamed from disk with the element
+    values re-derived, so they are identical to the recorded ones.
+    """
+    with open(path, "rb") as f:
+        magic, version, seed, initial_size = _HEADER.unpack(f.read(_HEADER.size))
+    if magic != TRACE_MAGIC or version != TRACE_VERSION:
+        raise ValueError(f"{path!r} is not a version {TRACE_VERSION} workload trace.")
+    header = TraceHeader(seed, initial_size)
+
+    def blocks() -> Iterator[Block]:
+        with open(path, "rb") as f:
+            f.seek(_HEADER.size)
+            while True:
+                raw = f.read(_BLOCK.size)
+                if len(raw) < _BLOCK.size:
+                    return
+                (count,) = _BLOCK.unpack(raw)
+                data = f.read(count * _UPDATE.size)
+                block = []
+                for kind, index, version in _UPDATE.iter_unpack(data):
+                    kind = UpdateKind(kind)
+                    new = derive_element(seed, index, version) if kind != UpdateKind.DELETE else None
+                    old = None
+                    if kind == UpdateKind.REPLACE:
+                        old = derive_element(seed, index, version - 1)
+                    elif kind == UpdateKind.DELETE:
+                        old = derive_element(seed, index, version)
+                    block.append(Update(kind, index, version, old, new))
+                yield block
+
+    return header, blocks()
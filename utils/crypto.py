@@ -1,10 +1,27 @@
 import hashlib
+import time
 from Crypto.Util import number
 import random
 
+from . import instrumentation
+
 def get_hash(data: bytes) -> bytes:
     """Computes the SHA-256 hash of the input data."""
-    return hashlib.sha256(data).digest()
+    if not instrumentation.ENABLED:
+        return hashlib.sha256(data).digest()
+    start = time.perf_counter()
+    digest = hashlib.sha256(data).digest()
+    instrumentation.record("get_hash", time.perf_counter() - start, len(data))
+    return digest
+
+def mod_pow(base: int, exponent: int, modulus: int) -> int:
+    """Computes base^exponent mod modulus. Use this instead of pow() so calls are instrumented."""
+    if not instrumentation.ENABLED:
+        return pow(base, exponent, modulus)
+    start = time.perf_counter()
+    result = pow(base, exponent, modulus)
+    instrumentation.record("mod_pow", time.perf_counter() - start, abs(exponent).bit_length())
+    return result
 
 def bytes_to_int(b: bytes) -> int:
     """Converts bytes to an integer."""
@@ -20,6 +37,7 @@ def prime_representatives(elements: list[bytes], bit_length: int) -> list[int]:
     This is a simplified mapping function. A robust implementation would use a
     more sophisticated and secure hash-to-prime function.
     """
+    start = time.perf_counter() if instrumentation.ENABLED else 0.0
     primes = []
     for el_hash in elements:
         # Use the element's hash as a seed for a deterministic RNG.
@@ -33,6 +51,8 @@ def prime_representatives(elements: list[bytes], bit_length: int) -> list[int]:
         # Generate a prime using the deterministic RNG.
         prime = number.getPrime(bit_length, randfunc=randfunc)
         primes.append(prime)
+    if instrumentation.ENABLED:
+        instrumentation.record("prime_representatives", time.perf_counter() - start, len(primes))
     return primes
 
 def product(numbers: list[int]) -> int:
@@ -42,6 +62,14 @@ def product(numbers: list[int]) -> int:
     """
     if not numbers:
         return 1
+    if instrumentation.ENABLED:
+        start = time.perf_counter()
+        result = _product(numbers)
+        instrumentation.record("product", time.perf_counter() - start, len(numbers) - 1)
+        return result
+    return _product(numbers)
+
+def _product(numbers: list[int]) -> int:
     # For short lists, linear product is fine. For longer lists, product tree is faster.
     if len(numbers) < 64:
         res = 1
@@ -0,0 +1,218 @@
+import hashlib
+import time
+
+from . import instrumentation
+
+# --- secp256k1: y^2 = x^3 + 7 over F_P, prime group order (cofactor 1) ---
+P = 2**256 - 2**32 - 977
+ORDER = 0xFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFEBAAEDCE6AF48A03BBFD25E8CD0364141
+B = 7
+
+# Points are kept in Jacobian coordinates (X, Y, Z), representing the affine
+# point (X/Z^2, Y/Z^3). Z == 0 is the point at infinity.
+INFINITY = (0, 1, 0)
+WINDOW_BITS = 4
+_SCALAR_BITS = 256
+COMPRESSED_SIZE = 33
+
+def is_infinity(p: tuple[int, int, int]) -> bool:
+    return p[2] == 0
+
+def double(p: tuple[int, int, int]) -> tuple[int, int, int]:
+    x1, y1, z1 = p
+    if z1 == 0 or y1 == 0:
+        return INFINITY
+    a = x1 * x1 % P
+    b = y1 * y1 % P
+    c = b * b % P
+    d = 2 * ((x1 + b) * (x1 + b) - a - c) % P
+    e = 3 * a % P
+    x3 = (e * e - 2 * d) % P
+    y3 = (e * (d - x3) - 8 * c) % P
+    z3 = 2 * y1 * z1 % P
+    return (x3, y3, z3)
+
+def add(p: tuple[int, int, int], q: tuple[int, int, int]) -> tuple[int, int, int]:
+    x1, y1, z1 = p
+    x2, y2, z2 = q
+    if z1 == 0:
+        return q
+    if z2 == 0:
+        return p
+    z1z1 = z1 * z1 % P
+    z2z2 = z2 * z2 % P
+    u1 = x1 * z2z2 % P
+    u2 = x2 * z1z1 % P
+    s1 = y1 * z2 * z2z2 % P
+    s2 = y2 * z1 * z1z1 % P
+    if u1 == u2:
+        return double(p) if s1 == s2 else INFINITY
+    h = u2 - u1
+    i = 4 * h * h % P
+    j = h * i % P
+    r = 2 * (s2 - s1) % P
+    v = u1 * i % P
+    x3 = (r * r - j - 2 * v) % P
+    y3 = (r * (v - x3) - 2 * s1 * j) % P
+    z3 = ((z1 + z2) * (z1 + z2) - z1z1 - z2z2) * h % P
+    return (x3, y3, z3)
+
+def add_affine(p: tuple[int, int, int], q: tuple[int, int]) -> tuple[int, int, int]:
+    """Adds an affine point q to a Jacobian point p (cheaper than add)."""
+    x1, y1, z1 = p
+    x2, y2 = q
+    if z1 == 0:
+        return (x2, y2, 1)
+    z1z1 = z1 * z1 % P
+    u2 = x2 * z1z1 % P
+    s2 = y2 * z1 * z1z1 % P
+    h = (u2 - x1) % P
+    r = 2 * (s2 - y1) % P
+    if h == 0:
+        return double(p) if r == 0 else INFINITY
+    hh = h * h % P
+    i = 4 * hh % P
+    j = h * i % P
+    v = x1 * i % P
+    x3 = (r * r - j - 2 * v) % P
+    y3 = (r * (v - x3) - 2 * y1 * j) % P
+    z3 = ((z1 + h) * (z1 + h) - z1z1 - hh) % P
+    return (x3, y3, z3)
+
+def negate(p: tuple[int, int, int]) -> tuple[int, int, int]:
+    return (p[0], -p[1] % P, p[2])
+
+def to_affine(p: tuple[int, int, int]) -> tuple[int, int] | None:
+    if p[2] == 0:
+        return None
+    z_inv = pow(p[2], -1, P)
+    z_inv2 = z_inv * z_inv % P
+    return (p[0] * z_inv2 % P, p[1] * z_inv2 * z_inv % P)
+
+def batch_to_affine(points: list[tuple[int, int, int]]) -> list[tuple[int, int]]:
+    """Converts finite Jacobian points to affine with a single field inversion."""
+    prefix = []
+    acc = 1
+    for p in points:
+        prefix.append(acc)
+        acc = acc * p[2] % P
+    inv = pow(acc, -1, P)
+    result = [None] * len(points)
+    for k in range(len(points) - 1, -1, -1):
+        x, y, z = points[k]
+        z_inv = inv * prefix[k] % P
+        inv = inv * z % P
+        z_inv2 = z_inv * z_inv % P
+        result[k] = (x * z_inv2 % P, y * z_inv2 * z_inv % P)
+    return result
+
+def scalar_mul(p: tuple[int, int, int], k: int) -> tuple[int, int, int]:
+    """Variable-base scalar multiplication (fixed 4-bit windows)."""
+    k %= ORDER
+    if not instrumentation.ENABLED:
+        return _scalar_mul(p, k)
+    start = time.perf_counter()
+    result = _scalar_mul(p, k)
+    instrumentation.record("ec_mul", time.perf_counter() - start, k.bit_length())
+    return result
+
+def _scalar_mul(p: tuple[int, int, int], k: int) -> tuple[int, int, int]:
+    if k == 0 or p[2] == 0:
+        return INFINITY
+    multiples = [INFINITY, p]
+    for _ in range(2, 1 << WINDOW_BITS):
+        multiples.append(add(multiples[-1], p))
+    result = INFINITY
+    for shift in range((k.bit_length() + WINDOW_BITS - 1) // WINDOW_BITS * WINDOW_BITS - WINDOW_BITS, -1, -WINDOW_BITS):
+        for _ in range(WINDOW_BITS):
+            result = double(result)
+        digit = (k >> shift) & ((1 << WINDOW_BITS) - 1)
+        if digit:
+            result = add(result, multiples[digit])
+    return result
+
+class FixedBaseTable:
+    """
+    Precomputed multiples d * 16^w * G of a fixed point G, in affine form.
+    A scalar multiplication is then at most 64 mixed additions and no doublings.
+    """
+
+    def __init__(self, point: tuple[int, int, int]):
+        rows = []
+        base = point
+        for _ in range(_SCALAR_BITS // WINDOW_BITS):
+            row = [base]
+            for _ in range(2, 1 << WINDOW_BITS):
+                row.append(add(row[-1], base))
+            rows.append(row)
+            base = add(row[-1], base)
+        flat = batch_to_affine([p for row in rows for p in row])
+        width = (1 << WINDOW_BITS) - 1
+        self.rows = [flat[i * width:(i + 1) * width] for i in range(len(rows))]
+
+    def mul(self, k: int) -> tuple[int, int, int]:
+        k %= ORDER
+        if not instrumentation.ENABLED:
+            return self._mul(k)
+        start = time.perf_counter()
+        result = self._mul(k)
+        instrumentation.record("ec_mul_fixed", time.perf_counter() - start, k.bit_length())
+        return result
+
+    def _mul(self, k: int) -> tuple[int, int, int]:
+        result = INFINITY
+        mask = (1 << WINDOW_BITS) - 1
+        row = 0
+        while k:
+            digit = k & mask
+            if digit:
+                result = add_affine(result, self.rows[row][digit - 1])
+            k >>= WINDOW_BITS
+            row += 1
+        return result
+
+def compress(p: tuple[int, int, int]) -> bytes:
+    """SEC1 compressed encoding; the point at infinity is 33 zero bytes."""
+    affine = to_affine(p)
+    if affine is None:
+        return b'\x00' * COMPRESSED_SIZE
+    x, y = affine
+    return bytes([2 + (y & 1)]) + x.to_bytes(32, 'big')
+
+def decompress(data: bytes) -> tuple[int, int, int]:
+    """Inverse of compress. Raises ValueError for an invalid encoding."""
+    if len(data) != COMPRESSED_SIZE:
+        raise ValueError("Invalid point encoding length.")
+    if data == b'\x00' * COMPRESSED_SIZE:
+        return INFINITY
+    if data[0] not in (2, 3):
+        raise ValueError("Invalid point encoding prefix.")
+    x = int.from_bytes(data[1:], 'big')
+    if x >= P:
+        raise ValueError("Point x-coordinate out of range.")
+    y = _sqrt((x * x * x + B) % P)
+    if y is None:
+        raise ValueError("Point is not on the curve.")
+    if (y & 1) != data[0] - 2:
+        y = P - y
+    return (x, y, 1)
+
+def _sqrt(a: int) -> int | None:
+    # P = 3 mod 4, so a square root is a^((P+1)/4).
+    y = pow(a, (P + 1) // 4, P)
+    return y if y * y % P == a else None
+
+def hash_to_point(seed: bytes) -> tuple[int, int, int]:
+    """
+    Deterministic 'nothing up my sleeve' point by try-and-increment.
+    Nobody knows the discrete log relations between such points, which is
+    what makes Pedersen commitments binding without a trusted setup.
+    """
+    counter = 0
+    while True:
+        digest = hashlib.sha256(seed + counter.to_bytes(4, 'big')).digest()
+        x = int.from_bytes(digest, 'big') % P
+        y = _sqrt((x * x * x + B) % P)
+        if y is not None:
+            return (x, y if y & 1 == 0 else P - y, 1)
+        counter += 1
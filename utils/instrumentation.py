@@ -0,0 +1,106 @@
+"""
+Opt-in counters and timers for the cryptographic primitives in utils.crypto.
+
+Instrumentation is off by default. When off, each primitive pays a single
+module-attribute check (`instrumentation.ENABLED`). When on, every call is
+attributed to the innermost active scope, e.g. the operation being benchmarked:
+
+    with instrumentation.capture() as stats:
+        with instrumentation.scope("prove"):
+            scheme.prove_membership(element)
+    stats.snapshot()["prove"]["primitives"]["mod_pow"]["calls"]
+"""
+from contextlib import contextmanager
+from dataclasses import dataclass, asdict
+from typing import Any, Iterator
+
+ENABLED = False
+UNSCOPED = "unscoped"
+
+@dataclass
+class PrimitiveStats:
+    """
+    Totals for one primitive within one scope.
+    `units` counts the primitive's own unit of work: bytes hashed for get_hash,
+    primes generated for prime_representatives, multiplications for product and
+    exponent bits for mod_pow.
+    """
+    calls: int = 0
+    time: float = 0.0
+    units: int = 0
+    max_units: int = 0
+
+class InstrumentationStats:
+    """Per-scope primitive totals, plus how many times each scope was entered."""
+
+    def __init__(self):
+        self.primitives: dict[str, dict[str, PrimitiveStats]] = {}
+        self.invocations: dict[str, int] = {}
+
+    def snapshot(self) -> dict[str, Any]:
+        """Returns the totals as plain, JSON-serializable dictionaries."""
+        return {
+            scope_name: {
+                "invocations": self.invocations.get(scope_name, 0),
+                "primitives": {name: asdict(s) for name, s in primitives.items()},
+            }
+            for scope_name, primitives in self.primitives.items()
+        }
+
+_stats = InstrumentationStats()
+_scopes: list[str] = []
+
+def enable():
+    global ENABLED
+    ENABLED = True
+
+def disable():
+    global ENABLED
+    ENABLED = False
+
+def reset():
+    """Discards all totals collected so far."""
+    global _stats
+    _stats = InstrumentationStats()
+
+def stats() -> InstrumentationStats:
+    return _stats
+
+def record(primitive: str, elapsed: float, units: int = 0):
+    """Adds one call of `primitive` to the current scope. Called by utils.crypto."""
+    scope_name = _scopes[-1] if _scopes else UNSCOPED
+    primitives = _stats.primitives.setdefault(scope_name, {})
+    s = primitives.get(primitive)
+    if s is None:
+        s = primitives[primitive] = PrimitiveStats()
+    s.calls += 1
+    s.time += elapsed
+    s.units += units
+    if units > s.max_units:
+        s.max_units = units
+
+@contextmanager
+def scope(name: str) -> Iterator[None]:
+    """Attributes primitive calls made inside the block to `name`."""
+    if not ENABLED:
+        yield
+        return
+    _scopes.append(name)
+    _stats.invocations[name] = _stats.invocations.get(name, 0) + 1
+    _stats.primitives.setdefault(name, {})
+    try:
+        yield
+    finally:
+        _scopes.pop()
+
+@contextmanager
+def capture() -> Iterator[InstrumentationStats]:
+    """Enables instrumentation with fresh totals for the duration of the block."""
+    previous = ENABLED
+    reset()
+    enable()
+    try:
+        yield _stats
+    finally:
+        if not previous:
+            disable()
@@ -0,0 +1,313 @@
+"""
+Pedersen vector commitments with inner-product-argument (IPA) openings and
+multiproofs, over secp256k1. No trusted setup: the basis points are derived
+by hashing.
+
+Vectors are committed in evaluation form over the domain {0, ..., width-1}:
+a vector (a_0, ..., a_{w-1}) is the polynomial f of degree < w with f(i) = a_i.
+Many openings f_j(z_j) = y_j, possibly of different commitments, are proven
+together with one IPA (the multiproof scheme used for Verkle trees).
+"""
+import hashlib
+from functools import lru_cache
+from typing import NamedTuple
+
+from . import curve
+from .curve import ORDER, FixedBaseTable, INFINITY
+
+Point = tuple[int, int, int]
+
+def hash_to_scalar(data: bytes) -> int:
+    return int.from_bytes(hashlib.sha256(data).digest(), 'big') % ORDER
+
+class Transcript:
+    """Fiat-Shamir transcript: challenges hash everything appended so far."""
+
+    def __init__(self, label: bytes):
+        self._state = hashlib.sha256(label)
+
+    def append_point(self, p: Point):
+        self._state.update(curve.compress(p))
+
+    def append_scalar(self, x: int):
+        self._state.update((x % ORDER).to_bytes(32, 'big'))
+
+    def challenge(self, label: bytes) -> int:
+        self._state.update(label)
+        x = int.from_bytes(self._state.digest(), 'big') % ORDER
+        self._state.update(x.to_bytes(32, 'big'))
+        return x
+
+class IpaSettings:
+    """
+    Basis points and precomputed domain constants for one vector width.
+    Use get_settings(width), which caches them.
+    """
+
+    def __init__(self, width: int):
+        if width < 2 or width & (width - 1):
+            raise ValueError("IPA width must be a power of two, at least 2.")
+        self.width = width
+        self.rounds = width.bit_length() - 1
+        basis = [curve.hash_to_point(b"ipa-basis" + i.to_bytes(4, 'big')) for i in range(width)]
+        self.tables = [FixedBaseTable(g) for g in basis]
+        self.q_table = FixedBaseTable(curve.hash_to_point(b"ipa-q"))
+        # A'(i) = prod_{k != i} (i - k) for the domain {0, ..., width-1}, and its inverse.
+        self.a_prime = []
+        for i in range(width):
+            v = 1
+            for k in range(width):
+                if k != i:
+                    v = v * (i - k) % ORDER
+            self.a_prime.append(v)
+        self.a_prime_inv = [pow(v, -1, ORDER) for v in self.a_prime]
+        # inv[d] = 1/d for d in -(width-1)..(width-1), d != 0
+        self.inv = {d: pow(d, -1, ORDER) for d in range(-(width - 1), width) if d != 0}
+
+    def commit(self, values: list[int]) -> Point:
+        """Pedersen commitment sum(values[i] * G_i)."""
+        result = INFINITY
+        for table, v in zip(self.tables, values):
+            if v:
+                result = curve.add(result, table.mul(v))
+        return result
+
+    def commit_sparse(self, coefficients: dict[int, int]) -> Point:
+        result = INFINITY
+        for i, v in coefficients.items():
+            if v:
+                result = curve.add(result, self.tables[i].mul(v))
+        return result
+
+    def update_commitment(self, commitment: Point, index: int, delta: int) -> Point:
+        """Returns the commitment after adding `delta` to entry `index` (one scalar multiplication)."""
+        if delta % ORDER == 0:
+            return commitment
+        return curve.add(commitment, self.tables[index].mul(delta))
+
+    def evaluation_weights(self, t: int) -> list[int]:
+        """
+        b with <a, b> = f(t) for the vector a in evaluation form (barycentric
+        formula). For t inside the domain this is the unit vector e_t.
+        """
+        if 0 <= t < self.width:
+            return [1 if i == t else 0 for i in range(self.width)]
+        a_t = 1
+        for k in range(self.width):
+            a_t = a_t * (t - k) % ORDER
+        denominators = [(t - i) * self.a_prime[i] % ORDER for i in range(self.width)]
+        inverses = _batch_inverse(denominators)
+        return [a_t * d % ORDER for d in inverses]
+
+    def quotient(self, values: list[int], index: int) -> list[int]:
+        """
+        Evaluation form of q(X) = (f(X) - f(index)) / (X - index).
+        At X = index it uses sum_i q(i) / A'(i) = 0, which holds because q has
+        degree below width - 1.
+        """
+        y = values[index]
+        q = [0] * self.width
+        acc = 0
+        for i in range(self.width):
+            if i == index:
+                continue
+            q[i] = (values[i] - y) * self.inv[i - index] % ORDER
+            acc += q[i] * self.a_prime_inv[i]
+        q[index] = -self.a_prime[index] * acc % ORDER
+        return q
+
+@lru_cache(maxsize=None)
+def get_settings(width: int) -> IpaSettings:
+    return IpaSettings(width)
+
+def _batch_inverse(values: list[int]) -> list[int]:
+    prefix = []
+    acc = 1
+    for v in values:
+        prefix.append(acc)
+        acc = acc * v % ORDER
+    inv = pow(acc, -1, ORDER)
+    result = [0] * len(values)
+    for k in range(len(values) - 1, -1, -1):
+        result[k] = inv * prefix[k] % ORDER
+        inv = inv * values[k] % ORDER
+    return result
+
+class IpaProof(NamedTuple):
+    left: list[bytes]   # Compressed L_k, one per round
+    right: list[bytes]  # Compressed R_k, one per round
+    a: int              # The final folded scalar
+
+def ipa_prove(settings: IpaSettings, transcript: Transcript, commitment: Point,
+              a: list[int], t: int, y: int) -> IpaProof:
+    """
+    Proves that `commitment` = sum(a_i G_i) opens to <a, b(t)> = y.
+
+    The folded generators are kept as coefficient vectors over the original
+    basis, so every point multiplication uses the precomputed fixed-base tables.
+    """
+    b = settings.evaluation_weights(t)
+    transcript.append_point(commitment)
+    transcript.append_scalar(t)
+    transcript.append_scalar(y)
+    w = transcript.challenge(b"w")
+
+    # generators[i] = {original basis index: coefficient}
+    generators = [{i: 1} for i in range(settings.width)]
+    a = list(a)
+    left, right = [], []
+    while len(a) > 1:
+        half = len(a) // 2
+        a_l, a_r = a[:half], a[half:]
+        b_l, b_r = b[:half], b[half:]
+        g_l, g_r = generators[:half], generators[half:]
+
+        z_l = sum(x * y_ for x, y_ in zip(a_r, b_l)) % ORDER
+        z_r = sum(x * y_ for x, y_ in zip(a_l, b_r)) % ORDER
+        l_coeffs: dict[int, int] = {}
+        for coeff, g in zip(a_l, g_r):
+            for j, s in g.items():
+                l_coeffs[j] = (l_coeffs.get(j, 0) + coeff * s) % ORDER
+        r_coeffs: dict[int, int] = {}
+        for coeff, g in zip(a_r, g_l):
+            for j, s in g.items():
+                r_coeffs[j] = (r_coeffs.get(j, 0) + coeff * s) % ORDER
+        point_l = curve.add(settings.commit_sparse(l_coeffs), settings.q_table.mul(w * z_r))
+        point_r = curve.add(settings.commit_sparse(r_coeffs), settings.q_table.mul(w * z_l))
+        transcript.append_point(point_l)
+        transcript.append_point(point_r)
+        left.append(curve.compress(point_l))
+        right.append(curve.compress(point_r))
+
+        x = transcript.challenge(b"x")
+        x_inv = pow(x, -1, ORDER)
+        a = [(l + x * r) % ORDER for l, r in zip(a_l, a_r)]
+        b = [(l + x_inv * r) % ORDER for l, r in zip(b_l, b_r)]
+        generators = [
+            {**gl, **{j: s * x_inv % ORDER for j, s in gr.items()}}
+            for gl, gr in zip(g_l, g_r)
+        ]
+    return IpaProof(left=left, right=right, a=a[0])
+
+def ipa_verify(settings: IpaSettings, transcript: Transcript, commitment: Point,
+               t: int, y: int, proof: IpaProof) -> bool:
+    """Verifies an IpaProof produced by ipa_prove with the same transcript state."""
+    if len(proof.left) != settings.rounds or len(proof.right) != settings.rounds:
+        return False
+    b = settings.evaluation_weights(t)
+    transcript.append_point(commitment)
+    transcript.append_scalar(t)
+    transcript.append_scalar(y)
+    w = transcript.challenge(b"w")
+
+    try:
+        points_l = [curve.decompress(p) for p in proof.left]
+        points_r = [curve.decompress(p) for p in proof.right]
+    except ValueError:
+        return False
+
+    folded = curve.add(commitment, settings.q_table.mul(w * y))
+    challenges = []
+    for point_l, point_r in zip(points_l, points_r):
+        transcript.append_point(point_l)
+        transcript.append_point(point_r)
+        x = transcript.challenge(b"x")
+        x_inv = pow(x, -1, ORDER)
+        challenges.append(x_inv)
+        folded = curve.add(folded, curve.add(curve.scalar_mul(point_l, x_inv), curve.scalar_mul(point_r, x)))
+
+    # s_i = product of x_k^-1 over the rounds k in which index i was in the right half.
+    s = [1] * settings.width
+    for k, x_inv in enumerate(challenges):
+        bit = settings.rounds - 1 - k
+        for i in range(settings.width):
+            if (i >> bit) & 1:
+                s[i] = s[i] * x_inv % ORDER
+    b0 = sum(si * bi for si, bi in zip(s, b)) % ORDER
+    expected = curve.add(
+        settings.commit([proof.a * si % ORDER for si in s]),
+        settings.q_table.mul(w * proof.a * b0)
+    )
+    return curve.to_affine(folded) == curve.to_affine(expected)
+
+class Opening(NamedTuple):
+    commitment: Point
+    index: int  # Domain point z
+    value: int  # Claimed f(z)
+
+class MultiProof(NamedTuple):
+    d: bytes  # Compressed commitment to the aggregated quotient g
+    ipa: IpaProof
+
+def multiproof_prove(settings: IpaSettings, openings: list[Opening], vectors: list[list[int]]) -> MultiProof:
+    """
+    Proves all `openings` at once. vectors[j] is the committed vector of openings[j].
+      r = H(openings); g = sum r^j (f_j - y_j) / (X - z_j); D = [g]
+      t = H(r, D);     h = sum r^j f_j / (t - z_j)
+    and an IPA shows that [h - g] = E - D opens at t to sum r^j y_j / (t - z_j),
+    where the verifier computes E = sum r^j / (t - z_j) C_j itself.
+    """
+    transcript = Transcript(b"multiproof")
+    for o in openings:
+        transcript.append_point(o.commitment)
+        transcript.append_scalar(o.index)
+        transcript.append_scalar(o.value)
+    r = transcript.challenge(b"r")
+
+    g = [0] * settings.width
+    powers = []
+    r_power = 1
+    for o, f in zip(openings, vectors):
+        q = settings.quotient(f, o.index)
+        for i in range(settings.width):
+            g[i] += r_power * q[i]
+        powers.append(r_power)
+        r_power = r_power * r % ORDER
+    g = [v % ORDER for v in g]
+    d = settings.commit(g)
+    transcript.append_point(d)
+    t = transcript.challenge(b"t")
+
+    h = [0] * settings.width
+    y = 0
+    for o, f, r_j in zip(openings, vectors, powers):
+        coeff = r_j * pow(t - o.index, -1, ORDER) % ORDER
+        y += coeff * o.value
+        for i in range(settings.width):
+            h[i] += coeff * f[i]
+    combined = [(hi - gi) % ORDER for hi, gi in zip(h, g)]
+    ipa = ipa_prove(settings, transcript, settings.commit(combined), combined, t, y % ORDER)
+    return MultiProof(d=curve.compress(d), ipa=ipa)
+
+def multiproof_verify(settings: IpaSettings, openings: list[Opening], proof: MultiProof) -> bool:
+    """Verifies a MultiProof for `openings`; see multiproof_prove."""
+    try:
+        d = curve.decompress(proof.d)
+    except ValueError:
+        return False
+    transcript = Transcript(b"multiproof")
+    for o in openings:
+        transcript.append_point(o.commitment)
+        transcript.append_scalar(o.index)
+        transcript.append_scalar(o.value)
+    r = transcript.challenge(b"r")
+    transcript.append_point(d)
+    t = transcript.challenge(b"t")
+    if 0 <= t < settings.width:
+        return False  # Negligible; t must lie outside the domain.
+
+    # Openings of the same commitment share one scalar multiplication.
+    coefficients: dict[tuple[int, int], list] = {}
+    y = 0
+    r_power = 1
+    for o in openings:
+        coeff = r_power * pow(t - o.index, -1, ORDER) % ORDER
+        y += coeff * o.value
+        key = curve.to_affine(o.commitment) or (0, 0)
+        entry = coefficients.setdefault(key, [o.commitment, 0])
+        entry[1] += coeff
+        r_power = r_power * r % ORDER
+    e = INFINITY
+    for point, coeff in coefficients.values():
+        e = curve.add(e, curve.scalar_mul(point, coeff))
+    return ipa_verify(settings, transcript, curve.add(e, curve.negate(d)), t, y % ORDER, proof.ipa)